@@ -1,103 +1,649 @@
-import asyncio
-import logging
-
-import aiohttp
-from aiohttp_scraper import Proxies, ScraperSession
-from tortoise import Tortoise
-
-from utils import config
-
-logging.basicConfig(
-    format="%(asctime)s,%(msecs)d %(levelname)-8s [%(filename)s:%(lineno)d] %(message)s",
-    datefmt="%Y-%m-%d:%H:%M",
-    level=logging.INFO,
-)
-proxy_map = {"Adidas": [config.proxy[0]], "Reebok": [config.proxy[1]]}
-
-
-class BaseScraper:
-    def __init__(self, *sections, maxtasks=2, limit=2, brand=""):
-        self.todo = set()
-        self.busy = set()
-        self.done = {}
-        self.tasks = set()
-        self.sem = asyncio.Semaphore(maxtasks)
-        self.retries = 3
-        self.sections = sections
-        self.section_url = ""
-        self.good_url = ""
-        self.brand = brand
-
-        # connector stores cookies between requests and uses connection pool
-        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.72 Safari/537.36"
-        self.headers = {
-            "User-Agent": user_agent,
-            "Accept-Language": "ru",
-        }
-        if self.brand in ["Adidas", "Reebok"]:
-            proxy = Proxies(
-                proxies=proxy_map[self.brand],
-                redis_uri=f"redis://{config.REDIS_IP}:6379",
-                window_size_in_minutes=5,
-                max_requests_per_window=300,
-                redis_kwargs={},
-            )
-        else:
-            proxy = None
-
-        self.session = ScraperSession(
-            headers=self.headers,
-            connector=aiohttp.TCPConnector(limit=limit),
-            proxies=proxy,
-        )
-        # self.session = aiohttp.ClientSession(headers=self.headers, connector=aiohttp.TCPConnector(limit=limit))
-
-    async def run(self):
-        logging.info("%s starting", self.brand)
-
-        await self._prepare_writer()
-
-        t = asyncio.ensure_future(
-            self.addurls(
-                [self.section_url.format(section) for section in self.sections]
-            )
-        )
-        await asyncio.sleep(1)
-        while self.busy:
-            await asyncio.sleep(1)
-
-        await t
-        # await asyncio.sleep(2)
-        await self.session.close()
-        await Tortoise.close_connections()
-        logging.info("%s scraped: %s items", self.brand, len(self.done))
-
-    async def addurls(self, urls):
-        for url in urls:
-            if url not in self.busy and url not in self.done and url not in self.todo:
-                self.todo.add(url)
-                await self.sem.acquire()
-
-                task = asyncio.ensure_future(self.process(url))
-                task.add_done_callback(lambda t: self.sem.release())
-                task.add_done_callback(self.tasks.remove)
-                self.tasks.add(task)
-
-    async def process(self, url):
-        pass
-
-    def select_type(self, url):
-        pass
-
-    def get_pages_count(self, data):
-        pass
-
-    async def parse_good(self, good_data, good_availability_data):
-        pass
-
-    async def _prepare_writer(self):
-        await Tortoise.init(
-            db_url=config.POSTGRES_URI,
-            modules={"models": ["utils.models"]},
-        )
-        await Tortoise.generate_schemas()
+import asyncio
+import collections
+import functools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import aiohttp
+from tortoise import Tortoise
+
+from utils import config, errors, jsonlib, metrics
+from utils.batch import prepare_goods
+from utils.cache import ResponseCache
+from utils.checkpoint import Checkpoint
+from utils.extract import extract_json, find_json
+from utils.frontier import Frontier
+from utils.incremental import IncrementalState
+from utils.limiter import AdaptiveLimiter
+from utils.models import Item
+from utils.proxies import ProxyPool
+from utils.retry import RetryPolicy
+from utils.seen import SeenSet
+from utils.sinks import FILE_SINKS
+from utils.writer import BulkWriter
+
+logging.basicConfig(
+    format="%(asctime)s,%(msecs)d %(levelname)-8s [%(filename)s:%(lineno)d] %(message)s",
+    datefmt="%Y-%m-%d:%H:%M",
+    level=logging.INFO,
+)
+
+
+async def open_writer(sink="postgres", path=None, db_url=None):
+    # db_url points the postgres sink's upsert at another database, e.g. sqlite
+    if sink == "postgres":
+        await Tortoise.init(
+            db_url=db_url or config.POSTGRES_URI,
+            modules={"models": ["utils.models"]},
+        )
+        await Tortoise.generate_schemas()
+        writer = BulkWriter(Item, prepare=prepare_goods)
+    else:
+        writer = FILE_SINKS[sink](path)
+    writer.start()
+    return writer
+
+
+def open_proxies(options):
+    redis_uri = None
+    if options["proxy_sync"]:
+        redis_uri = f"redis://{config.REDIS_IP}:6379"
+    proxies = ProxyPool(config.proxy, redis_uri=redis_uri)
+    proxies.start()
+    return proxies
+
+
+def open_executor(kind, workers=None):
+    # None for inline parsing
+    if kind == "process":
+        # spawned workers do not inherit the event loop or its threads
+        return ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=jsonlib.use,
+            initargs=(jsonlib.backend,),
+        )
+    if kind == "thread":
+        return ThreadPoolExecutor(workers)
+    return None
+
+
+async def close_writer(writer):
+    await writer.close()
+    if isinstance(writer, BulkWriter):
+        await Tortoise.close_connections()
+
+
+class ParseContext:
+    # sub-parser results for one item: parse_good may ask for the same result
+    # several times, each parser runs once per set of arguments and nothing is
+    # shared between items
+    __slots__ = ("payload", "_results")
+
+    def __init__(self, *payload):
+        self.payload = payload
+        self._results = {}
+
+    def __call__(self, parser, *args):
+        # payloads are dicts and structs, so arguments are told apart by
+        # identity and kept alive with the result so an id is not reused
+        key = parser, tuple(map(id, args))
+        try:
+            return self._results[key][1]
+        except KeyError:
+            result = parser(*(args or self.payload))
+            self._results[key] = args, result
+            return result
+
+
+class BaseScraper:
+    # per-spider defaults, overridden by options passed from start.py
+    profile = {
+        "maxtasks": 2,
+        "maxtasks_cap": 8,
+        "limit": 8,
+        "limit_per_host": 0,
+        "ttl_dns_cache": 10,
+        "keepalive_timeout": 15,
+        # inline, thread or process. Only the streamed json slices get parsed,
+        # and in bench_crawl a pool is slower than the event loop for all shops
+        "parse_executor": "inline",
+        "parse_workers": None,
+        # directory for the resumable frontier checkpoint, None disables it
+        "checkpoint_dir": None,
+        "resume": False,
+        # frontier lanes by select_type, product pages are served more often
+        "frontier_weights": {"good": 4, "section": 1},
+        # listing pages wait while this many product pages are queued
+        "max_pending": 2000,
+        # urls queued before addurls waits for workers to take some
+        "max_queued": 10000,
+        # size of the bloom filter in front of the seen set, 0 disables it
+        "seen_bloom_bits": 0,
+        # skip unchanged product pages and goods using the page_state table
+        "incremental": False,
+        # ignore the stored validators and hashes, e.g. after a parser changed
+        "refresh": False,
+        # orjson, msgspec or json, None picks the fastest installed
+        "json_backend": None,
+        # postgres or one of utils.sinks.FILE_SINKS, with an optional file path
+        "sink": "postgres",
+        "sink_path": None,
+        # route requests through config.proxy, sharing quotas over redis
+        "proxies": False,
+        "proxy_sync": False,
+        # attempts per request and the share of requests that may be retries
+        "retries": 3,
+        "retry_budget": 0.2,
+        # fetch the pages that failed once more after the frontier drains
+        "second_pass": True,
+        # sqlite file caching response bodies for development runs, entries
+        # expire after cache_ttl seconds and replay never goes online
+        "cache_path": None,
+        "cache_ttl": None,
+        "cache_max_mb": 2048,
+        "replay": False,
+    }
+    default_sections = ("1",)
+
+    def __init__(self, *sections, brand="", writer=None, proxy_pool=None, **options):
+        self.options = dict(self.profile)
+        self.options.update((k, v) for k, v in options.items() if v is not None)
+        jsonlib.use(self.options["json_backend"])
+
+        self.queue = Frontier(
+            self.select_type,
+            self.options["frontier_weights"],
+            self.options["max_pending"],
+            self.options["max_queued"],
+        )
+        self.seen = SeenSet(bloom_bits=self.options["seen_bloom_bits"])
+        self.busy = set()
+        self.tasks = set()
+        self.maxtasks = max(self.options["maxtasks"], self.options["maxtasks_cap"])
+        self.limiter = AdaptiveLimiter(self.options["maxtasks"], maximum=self.maxtasks)
+        self.retry = RetryPolicy(
+            self.options["retries"], budget_ratio=self.options["retry_budget"]
+        )
+        # url -> failure kind, the seen set cannot list them
+        self.failed = {}
+        self.sections = sections or self.default_sections
+        self.section_url = ""
+        self.good_url = ""
+        self.brand = brand
+        self.writer = writer
+        self.session = None
+        # a pool given to the scraper is shared with other shops and not closed
+        self.proxies = proxy_pool
+        self.own_proxies = False
+        self.cache = None
+        # like the proxy pool, an executor set from outside is shared
+        self.executor = None
+        self.own_executor = False
+        self.checkpoint = None
+        # (writer generation, url, ok) of pages whose goods may not be written
+        self.unwritten = collections.deque()
+        # pages whose goods the writer dropped
+        self.dropped_pages = 0
+        self.incremental = None
+        self.metrics = metrics.REGISTRY
+
+        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.72 Safari/537.36"
+        self.headers = {
+            "User-Agent": user_agent,
+            "Accept-Language": "ru",
+        }
+
+    def _open_session(self):
+        # connector stores cookies between requests and uses connection pool
+        if self.options["proxies"] and self.proxies is None:
+            self.proxies = open_proxies(self.options)
+            self.own_proxies = True
+
+        # every request is a single attempt, fetch does the retrying
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=aiohttp.TCPConnector(
+                limit=self.options["limit"],
+                limit_per_host=self.options["limit_per_host"],
+                ttl_dns_cache=self.options["ttl_dns_cache"],
+                keepalive_timeout=self.options["keepalive_timeout"],
+            ),
+        )
+
+    async def run(self):
+        await self._prepare_writer()
+        try:
+            await self.crawl()
+        finally:
+            await close_writer(self.writer)
+
+    def seed_urls(self):
+        return [self.section_url.format(section) for section in self.sections]
+
+    async def crawl(self):
+        logging.info("%s starting", self.brand)
+        workers = self._start()
+        self.writer.listeners.append(self.commit_pages)
+        finished = False
+        try:
+            if self.options["incremental"]:
+                self.incremental = IncrementalState(self.brand, self.options["refresh"])
+                await self.incremental.load()
+            if not await self._open_checkpoint():
+                await self.addurls(self.seed_urls())
+            await self.queue.join()
+            if self.options["second_pass"]:
+                await self.retry_failed()
+            finished = True
+        finally:
+            # a failed crawl leaves nothing running behind, and keeps what it
+            # got in the checkpoint and the incremental state
+            await self._stop(workers)
+            try:
+                await self.writer.flush()
+            finally:
+                self.writer.listeners.remove(self.commit_pages)
+            if self.incremental is not None:
+                await self.incremental.close()
+            if self.checkpoint is not None:
+                await self._close_checkpoint(finished)
+
+        if self.incremental is not None:
+            logging.info(
+                "%s unchanged goods skipped: %s", self.brand, self.incremental.skipped
+            )
+        logging.info("%s scraped: %s items", self.brand, self.seen.finished)
+        if self.failed:
+            logging.warning("%s failed: %s pages", self.brand, len(self.failed))
+        logging.info("%s frontier high-water: %s", self.brand, self.queue.high_water)
+
+    def _start(self):
+        self._open_session()
+        self._open_cache()
+        self._open_executor()
+        self._register_gauges()
+        return [self.spawn(self.worker()) for _ in range(self.maxtasks)]
+
+    def _register_gauges(self):
+        brand, limiter, queue = self.brand, self.limiter, self.queue
+        self.metrics.gauge("scraper_queue_depth", self.queue.qsize, brand=brand)
+        self.metrics.gauge(
+            "scraper_frontier_blocked", lambda: queue.blocked, brand=brand
+        )
+        for lane in queue.lanes:
+            self.metrics.gauge(
+                "scraper_frontier_pending",
+                functools.partial(queue.pending, lane),
+                brand=brand,
+                lane=lane,
+            )
+            self.metrics.gauge(
+                "scraper_frontier_high_water",
+                functools.partial(queue.high_water.get, lane),
+                brand=brand,
+                lane=lane,
+            )
+        self.metrics.gauge("scraper_busy", self.busy.__len__, brand=brand)
+        self.metrics.gauge("scraper_in_flight", lambda: limiter.in_flight, brand=brand)
+        self.metrics.gauge(
+            "scraper_concurrency_limit", lambda: int(limiter.limit), brand=brand
+        )
+        budget = self.retry.budget
+        self.metrics.gauge("scraper_retry_budget", lambda: budget.tokens, brand=brand)
+        self.metrics.gauge("scraper_failed_pages", self.failed.__len__, brand=brand)
+
+    async def _stop(self, workers):
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+        await self.session.close()
+        if self.cache is not None:
+            await self.cache.close()
+            self.cache = None
+        if self.own_proxies:
+            await self.proxies.close()
+            self.proxies = None
+            self.own_proxies = False
+        if self.own_executor:
+            self.executor.shutdown()
+            self.executor = None
+            self.own_executor = False
+
+    def _open_cache(self):
+        path = self.options["cache_path"]
+        if path is not None:
+            self.cache = ResponseCache(
+                path,
+                ttl=self.options["cache_ttl"],
+                max_bytes=self.options["cache_max_mb"] << 20,
+                replay=self.options["replay"],
+            )
+
+    async def _open_checkpoint(self):
+        directory = self.options["checkpoint_dir"]
+        if directory is None:
+            return False
+
+        name = self.brand.lower().replace(" ", "_") + ".sqlite"
+        self.checkpoint = Checkpoint(os.path.join(directory, name))
+        await self.checkpoint.open(resume=self.options["resume"])
+        if not self.options["resume"]:
+            return False
+
+        done, queued = await self.checkpoint.load()
+        if not done and not queued:
+            return False
+        logging.info(
+            "%s resuming: %s done, %s queued", self.brand, len(done), len(queued)
+        )
+        self.seen.update(done)
+        # the kind of failure was not kept, they get the second pass
+        self.failed.update((url, None) for url, ok in done.items() if not ok)
+        await self.addurls(queued)
+        return True
+
+    async def _close_checkpoint(self, finished):
+        # a finished crawl has nothing to resume, unless goods of some pages
+        # never reached the sink
+        missing = len(self.unwritten) + self.dropped_pages
+        if finished and not missing:
+            await self.checkpoint.close(remove=True)
+            return
+        await self.checkpoint.close()
+        if missing:
+            logging.error(
+                "%s: goods of %s pages were not written, --resume fetches them again",
+                self.brand,
+                missing,
+            )
+
+    def _open_executor(self):
+        if self.executor is None:
+            self.executor = open_executor(
+                self.options["parse_executor"], self.options["parse_workers"]
+            )
+            self.own_executor = self.executor is not None
+
+    async def parse(self, func, *args):
+        # cpu bound extraction runs off the event loop thread
+        started = time.perf_counter()
+        try:
+            if self.executor is None:
+                return func(*args)
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            # with an executor this includes waiting for a worker and pickling
+            self.metrics.observe(
+                "scraper_parse_seconds",
+                time.perf_counter() - started,
+                metrics.PARSE_BUCKETS,
+                brand=self.brand,
+                parser=func.__name__,
+            )
+
+    async def addurls(self, urls):
+        for url in urls:
+            if self.seen.add(url):
+                if self.checkpoint is not None:
+                    self.checkpoint.queued(url)
+                await self.queue.put(url)
+
+    async def retry_failed(self):
+        # Pages that failed for a reason that may have passed are queued once
+        # more, after any open breaker lets a probe through. Urls they lead to
+        # are crawled in the same pass.
+        failed = self.failed.items()
+        urls = [url for url, kind in failed if kind not in errors.PERMANENT]
+        if not urls:
+            return
+        await self.retry.wait_closed()
+        logging.info("%s second pass over %s failed pages", self.brand, len(urls))
+        for url in urls:
+            del self.failed[url]
+            await self.queue.put(url)
+        await self.queue.join()
+
+    def spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def worker(self):
+        while True:
+            url = await self.queue.get()
+            self.busy.add(url)
+            try:
+                await self.process(url)
+            except errors.NotModified:
+                self.mark_done(url, True)
+            except Exception as exc:
+                logging.warning("%s : %s", url.split("&")[0], exc)
+                kind = self.failed[url] = errors.classify(exc)
+                self.metrics.inc(
+                    "scraper_page_failures_total",
+                    brand=self.brand,
+                    kind=kind,
+                    exception=type(exc).__name__,
+                )
+                self.mark_done(url, False)
+            else:
+                self.mark_done(url, True)
+            finally:
+                self.busy.discard(url)
+                self.queue.task_done()
+
+            if self.seen.finished % 100 == 0:
+                logging.info(
+                    "%s completed tasks, %s in progress, todo %s, limit %s",
+                    self.seen.finished,
+                    len(self.busy),
+                    self.queue.qsize(),
+                    int(self.limiter.limit),
+                )
+
+    def mark_done(self, url, ok):
+        self.seen[url] = ok
+        self.metrics.inc(
+            "scraper_pages_total", brand=self.brand, status="ok" if ok else "failed"
+        )
+        if self.checkpoint is not None or self.incremental is not None:
+            # done in the checkpoint, and its validators kept, once the writer
+            # has the page's goods in the sink
+            self.unwritten.append((self.writer.generation, url, ok))
+
+    async def commit_pages(self, generation, written):
+        # pages whose goods the writer dropped stay queued in the checkpoint
+        if self.incremental is not None:
+            await self.incremental.written(generation, written)
+        while self.unwritten and self.unwritten[0][0] <= generation:
+            _, url, ok = self.unwritten.popleft()
+            if not written:
+                self.dropped_pages += 1
+            elif self.checkpoint is not None:
+                self.checkpoint.finished(url, ok)
+            if self.incremental is not None:
+                await self.incremental.page_done(url, ok and written)
+
+    def parse_failed(self, url, exc):
+        # a page the spider gave up on keeps no validators, or the next crawl
+        # would get a 304 for a good that was never written
+        logging.debug("%s : %s", url.split("&")[0], exc)
+        if self.incremental is not None:
+            self.incremental.forget_page(url)
+
+    def parse_context(self, *payload):
+        return ParseContext(*payload)
+
+    async def save(self, good):
+        self.metrics.inc("scraper_goods_total", brand=self.brand)
+        incremental = self.incremental
+        if incremental is None or incremental.changed(good, self.writer.generation):
+            await self.writer.put(good)
+
+    async def get_json(self, url, conditional=False):
+        return await self.fetch("get_json", url, conditional)
+
+    async def get_html(self, url, conditional=False):
+        return await self.fetch("get_html", url, conditional)
+
+    async def get_bytes(self, url, conditional=False):
+        # raw body for the typed decoders in utils.schema
+        return await self.fetch("get_bytes", url, conditional)
+
+    async def extract(self, url, *markers, conditional=False):
+        # json embedded in a page, the body is only read until it is found
+        return await self.fetch("extract", url, conditional, markers)
+
+    def request_labels(self, url):
+        return {
+            "brand": self.brand,
+            "host": urlsplit(url).hostname or "",
+            "type": self.select_type(url) or "other",
+        }
+
+    async def fetch(self, method, url, conditional=False, markers=()):
+        labels = self.request_labels(url)
+        if self.cache is not None:
+            entry = await self.cache.get(url)
+            if entry is not None:
+                self.metrics.inc("scraper_cache_hits_total", **labels)
+                return self._decode(method, markers, *entry)
+            if self.cache.replay:
+                raise errors.CacheMiss(url)
+
+        host = labels["host"]
+        breaker = self.retry.breakers.get(host)
+        if breaker is None:
+            breaker = self.retry.breaker(host)
+            self.metrics.gauge(
+                "scraper_circuit_open",
+                lambda: int(breaker.open),
+                brand=self.brand,
+                host=host,
+            )
+        conditional = conditional and self.incremental is not None
+        headers = self.incremental.validators(url) if conditional else {}
+        self.retry.budget.deposit()
+
+        attempt = 0
+        while True:
+            if not await breaker.wait():
+                self.metrics.inc(
+                    "scraper_request_failures_total",
+                    kind=errors.CIRCUIT,
+                    exception="CircuitOpen",
+                    **labels,
+                )
+                raise errors.CircuitOpen(f"circuit open for {host}")
+
+            # a proxy's token bucket is waited for before the slot is taken, a
+            # local quota is neither shop latency nor load on the shop
+            proxy = None
+            if self.proxies is not None:
+                proxy = await self.proxies.acquire()
+            # the slot is only held for the attempt, not the backoff
+            await self.limiter.acquire()
+            started = time.monotonic()
+            failure = None
+            try:
+                return await self._get(
+                    method, url, proxy, headers, conditional, markers, labels
+                )
+            except errors.NotModified:
+                self.metrics.inc("scraper_not_modified_total", **labels)
+                raise
+            except Exception as exc:
+                failure = errors.classify(exc)
+                error = exc
+            finally:
+                elapsed = time.monotonic() - started
+                self.metrics.observe("scraper_request_seconds", elapsed, **labels)
+                await self.limiter.release(elapsed, failure)
+                breaker.record(failure)
+
+            if not self.retry.should_retry(failure, attempt):
+                self.metrics.inc(
+                    "scraper_request_failures_total",
+                    kind=failure,
+                    exception=type(error).__name__,
+                    **labels,
+                )
+                raise error
+            self.metrics.inc(
+                "scraper_retries_total",
+                kind=failure,
+                exception=type(error).__name__,
+                **labels,
+            )
+            await asyncio.sleep(self.retry.backoff(failure, attempt, error))
+            attempt += 1
+
+    async def _get(self, method, url, proxy, headers, conditional, markers, labels):
+        # a single attempt, through the proxy picked for it if any
+        failure = None
+        try:
+            async with self.session.get(
+                url, headers=headers, proxy=proxy and proxy.url
+            ) as response:
+                if response.status == 304:
+                    raise errors.NotModified(url)
+                response.raise_for_status()
+                if self.cache is not None:
+                    # the whole page is kept, whatever this run looks for in it
+                    raw = await response.read()
+                    await self.cache.put(url, raw, response.charset)
+                    body = self._decode(method, markers, raw, response.charset)
+                elif markers:
+                    body = await extract_json(response, markers)
+                elif method == "get_json":
+                    body = jsonlib.loads(await response.read())
+                elif method == "get_bytes":
+                    body = await response.read()
+                else:
+                    body = await response.text()
+                if conditional:
+                    self.incremental.fetched_page(url, response.headers)
+                self.metrics.inc(
+                    "scraper_response_bytes_total",
+                    response.content.total_bytes,
+                    **labels,
+                )
+                return body
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            failure = errors.classify(exc)
+            raise
+        finally:
+            if proxy is not None:
+                self.proxies.release(proxy, failure not in errors.PROXY_FAILURES)
+
+    def _decode(self, method, markers, body, charset):
+        if markers:
+            return find_json(body, markers)
+        if method == "get_json":
+            return jsonlib.loads(body)
+        if method == "get_bytes":
+            return body
+        return body.decode(charset or "utf-8")
+
+    async def process(self, url):
+        pass
+
+    def select_type(self, url):
+        pass
+
+    def get_pages_count(self, data):
+        pass
+
+    async def parse_good(self, good_data, good_availability_data):
+        pass
+
+    async def _prepare_writer(self):
+        self.writer = await open_writer(self.options["sink"], self.options["sink_path"])
@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from base_scraper import close_writer, open_writer  # noqa: E402
+from benchmarks.fakeshop import FakeShop  # noqa: E402
+from spiders import CRAWLER_SELECT  # noqa: E402
+from utils import metrics  # noqa: E402
+from utils.sinks import FILE_SINKS  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def cpu_time():
+    # seconds of this process and its finished parse workers
+    if resource is None:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def peak_rss():
+    # MB, ru_maxrss on linux keeps the peak of the forking parent across exec
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # kilobytes on linux, bytes on macos
+    unit = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 2**20
+
+
+def totals(snapshot):
+    counts = {}
+    for name, labels, value in snapshot["counters"]:
+        key = name
+        if name == "scraper_pages_total":
+            key += "." + labels["status"]
+        counts[key] = counts.get(key, 0) + value
+    return counts
+
+
+def shop_hosts(shop):
+    # where the spider's urls point, the fixtures in a response cache are
+    # taken from these hosts
+    scraper = CRAWLER_SELECT[shop]()
+    return {urlsplit(scraper.section_url).hostname, urlsplit(scraper.good_url).hostname}
+
+
+def redirect(scraper, base):
+    # the spiders' absolute urls point at the fake shop instead
+    for name in ("section_url", "good_url"):
+        url = getattr(scraper, name)
+        setattr(scraper, name, re.sub(r"^https?://[^/]+", base, url))
+
+
+async def crawl(shop, base, options, sink, db_url):
+    scraper = CRAWLER_SELECT[shop](**options)
+    redirect(scraper, base)
+    path = None
+    if sink != "postgres":
+        path = os.path.join(tempfile.mkdtemp(), "goods" + FILE_SINKS[sink].suffix)
+    scraper.writer = await open_writer(sink, path, db_url=db_url)
+
+    started = time.perf_counter()
+    try:
+        await scraper.crawl()
+    finally:
+        await close_writer(scraper.writer)
+        if path is not None:
+            shutil.rmtree(os.path.dirname(path))
+    elapsed = time.perf_counter() - started
+
+    counts = totals(metrics.REGISTRY.snapshot())
+    return {
+        "shop": shop,
+        "seconds": elapsed,
+        "pages": counts.get("scraper_pages_total.ok", 0),
+        "failed": len(scraper.failed),
+        "goods": counts.get("scraper_goods_total", 0),
+        "rows": scraper.writer.written,
+        "mb": counts.get("scraper_response_bytes_total", 0) / 2**20,
+        "retries": counts.get("scraper_retries_total", 0),
+        "high_water": scraper.queue.high_water,
+        "cpu": cpu_time(),
+        "rss": peak_rss(),
+    }
+
+
+def bench_one(shop, base, options, sink, db_url, verbose):
+    # runs in a fresh process, so cpu time and peak rss belong to this crawl
+    logging.getLogger().setLevel(logging.INFO if verbose else logging.WARNING)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop.run_until_complete(crawl(shop, base, options, sink, db_url))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="crawl benchmark against a fake shop")
+    parser.add_argument("shops", nargs="*", help="all of them by default")
+    parser.add_argument("--goods", type=int, default=480, help="goods per section")
+    parser.add_argument("--page-kb", type=int, default=64, help="html page size")
+    parser.add_argument("--latency", type=float, default=0, help="ms per response")
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument(
+        "--fixtures", help="directory with recorded responses or a --cache file"
+    )
+    parser.add_argument("--sink", choices=("postgres", *FILE_SINKS), default="postgres")
+    parser.add_argument(
+        "--db-url", default="sqlite://:memory:", help="database of the postgres sink"
+    )
+    parser.add_argument("--maxtasks", type=int)
+    parser.add_argument("--maxtasks-cap", type=int)
+    parser.add_argument("--max-pending", type=int)
+    parser.add_argument("--max-queued", type=int)
+    parser.add_argument("--parse-executor", choices=("process", "thread", "inline"))
+    parser.add_argument("--json-backend")
+    parser.add_argument("--output", help="also write the results as json")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    for shop in args.shops:
+        if shop not in CRAWLER_SELECT:
+            choices = ", ".join(CRAWLER_SELECT)
+            parser.error(f"unknown shop {shop}, choose from {choices}")
+
+    options = {
+        "maxtasks": args.maxtasks,
+        "maxtasks_cap": args.maxtasks_cap,
+        "max_pending": args.max_pending,
+        "max_queued": args.max_queued,
+        "parse_executor": args.parse_executor,
+        "json_backend": args.json_backend,
+        "proxies": False,
+    }
+    loop = asyncio.get_event_loop()
+    results = []
+    print(
+        f"{'shop':<12}{'pages':>7}{'pages/s':>9}{'goods':>7}{'goods/s':>9}"
+        f"{'rows':>7}{'MB':>7}{'retries':>8}{'failed':>7}{'cpu s':>7}{'rss MB':>8}"
+    )
+    for shop in args.shops or CRAWLER_SELECT:
+        fake = FakeShop(
+            shop,
+            goods=args.goods,
+            page_size=args.page_kb << 10,
+            latency=args.latency / 1000,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            fixtures=args.fixtures,
+            fixture_hosts=shop_hosts(shop),
+        )
+        base = await fake.start()
+        # spawn keeps the child clear of this process's loop and memory
+        context = multiprocessing.get_context("spawn")
+        try:
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                result = await loop.run_in_executor(
+                    pool,
+                    bench_one,
+                    shop,
+                    base,
+                    options,
+                    args.sink,
+                    args.db_url,
+                    args.verbose,
+                )
+        finally:
+            await fake.close()
+        result["requests"] = fake.requests
+        result["injected_errors"] = fake.errors
+        results.append(result)
+
+        seconds = result["seconds"]
+        cpu = "n/a" if result["cpu"] is None else f"{result['cpu']:.1f}"
+        rss = "n/a" if result["rss"] is None else f"{result['rss']:.0f}"
+        print(
+            f"{shop:<12}{result['pages']:>7}{result['pages'] / seconds:>9.1f}"
+            f"{result['goods']:>7}{result['goods'] / seconds:>9.1f}"
+            f"{result['rows']:>7}{result['mb']:>7.1f}{result['retries']:>8}"
+            f"{result['failed']:>7}{cpu:>7}{rss:>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(main())
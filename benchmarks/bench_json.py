@@ -0,0 +1,60 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import payloads  # noqa: E402
+from utils import jsonlib  # noqa: E402
+
+
+def synthetic(samples):
+    return {
+        kind: [payloads.encode(factory(seed)) for seed in range(samples)]
+        for kind, factory in payloads.KINDS.items()
+    }
+
+
+def recorded(directory):
+    # <kind>*.json, e.g. adidas_product-GX1234.json saved from a real response
+    bodies = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        kind = os.path.basename(path).split("-")[0].rsplit(".", 1)[0]
+        with open(path, "rb") as f:
+            bodies.setdefault(kind, []).append(f.read())
+    return bodies
+
+
+def timed(loads, bodies, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for body in bodies:
+            loads(body)
+        best = min(best, time.perf_counter() - started)
+    return best / len(bodies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="json backend benchmark")
+    parser.add_argument("--fixtures", help="directory with recorded json responses")
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    bodies = recorded(args.fixtures) if args.fixtures else synthetic(args.samples)
+    # the old path: the session decoded the body to str before json.loads
+    backends = {"json (str)": lambda body: jsonlib.BACKENDS["json"](body.decode())}
+    backends.update(jsonlib.BACKENDS)
+
+    print(f"{'payload':<22}{'KB':>7}" + "".join(f"{name:>13}" for name in backends))
+    for kind, samples in bodies.items():
+        size = sum(map(len, samples)) / len(samples) / 1024
+        row = [timed(loads, samples, args.rounds) for loads in backends.values()]
+        print(f"{kind:<22}{size:>7.1f}" + "".join(f"{t * 1e6:>11.0f}us" for t in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from base_scraper import ParseContext  # noqa: E402
+from benchmarks import payloads  # noqa: E402
+from spiders import adidas, lacoste, new_balance, shein, timberland  # noqa: E402
+
+
+class Uncached(ParseContext):
+    # reruns the sub-parser on every lookup, like parse_good used to
+    __slots__ = ()
+
+    def __call__(self, parser, *args):
+        return parser(*(args or self.payload))
+
+
+def calls(samples):
+    # (spider, list of parse_good arguments) per shop
+    encode = payloads.encode
+    return {
+        "adidas": (
+            adidas.AdidasScraper(),
+            [
+                (
+                    adidas.decode_product(encode(payloads.adidas_product(seed))),
+                    adidas.decode_availability(encode(payloads.adidas_availability(seed))),
+                )
+                for seed in range(samples)
+            ],
+        ),
+        "shein": (
+            shein.SheinScraper(),
+            [
+                ("https://ru.shein.com/x.html", shein.load_product(encode(payloads.shein_product(seed))))
+                for seed in range(samples)
+            ],
+        ),
+        "lacoste": (
+            lacoste.LacosteScraper(),
+            [
+                (good,)
+                for seed in range(samples // 24 + 1)
+                for good in lacoste.load_catalog(encode(payloads.lacoste_catalog(seed))).list
+            ][:samples],
+        ),
+        "nb": (
+            new_balance.NBScraper(),
+            [
+                (new_balance.load_page(encode(payloads.KINDS["nb_product"](seed))),)
+                for seed in range(samples)
+            ],
+        ),
+        "timberland": (
+            timberland.TimberlandScraper(),
+            [
+                timberland.load_page(
+                    encode(payloads.KINDS["timberland_product"](seed)),
+                    encode(payloads.timberland_sizes(seed)),
+                )
+                for seed in range(samples)
+            ],
+        ),
+    }
+
+
+async def timed(spider, arguments, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for args in arguments:
+            await spider.parse_good(*args)
+        best = min(best, time.perf_counter() - started)
+    return best / len(arguments)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="parse_good micro-benchmark")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    async def discard(good):
+        pass
+
+    print(f"{'spider':<12}{'uncached us':>13}{'context us':>12}{'speedup':>9}")
+    for name, (spider, arguments) in calls(args.samples).items():
+        spider.save = discard
+        spider.parse_context = Uncached
+        before = await timed(spider, arguments, args.rounds)
+        spider.parse_context = ParseContext
+        after = await timed(spider, arguments, args.rounds)
+        print(f"{name:<12}{before * 1e6:>13.1f}{after * 1e6:>12.1f}{before / after:>8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(main())
@@ -0,0 +1,69 @@
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import payloads  # noqa: E402
+from spiders import adidas, lacoste, new_balance, shein, timberland  # noqa: E402
+from utils import jsonlib, schema  # noqa: E402
+
+DECODERS = {
+    "adidas_product": adidas.decode_product,
+    "adidas_availability": adidas.decode_availability,
+    "adidas_listing": adidas.decode_listing,
+    "shein_product": shein.decode_product,
+    "lacoste_catalog": lacoste.decode_nuxt,
+    "nb_listing": new_balance.decode_page,
+    "nb_product": new_balance.decode_page,
+    "timberland_product": timberland.decode_page,
+    "timberland_sizes": timberland.decode_sizes,
+}
+
+
+def timed(decode, bodies, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for body in bodies:
+            decode(body)
+        best = min(best, time.perf_counter() - started)
+    return best / len(bodies)
+
+
+def retained(decode, bodies):
+    gc.collect()
+    tracemalloc.start()
+    kept = [decode(body) for body in bodies]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current / len(bodies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="typed schema decoding benchmark")
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    typed = "msgspec" if schema.msgspec is not None else "slotted"
+    print(f"dicts: {jsonlib.backend}, structs: {typed}")
+    print(f"{'payload':<22}{'dict us':>9}{'struct us':>11}{'dict KB':>10}{'struct KB':>11}")
+    for kind, decode in DECODERS.items():
+        factory = payloads.KINDS[kind]
+        bodies = [payloads.encode(factory(seed)) for seed in range(args.samples)]
+        row = (
+            timed(jsonlib.loads, bodies, args.rounds) * 1e6,
+            timed(decode, bodies, args.rounds) * 1e6,
+            retained(jsonlib.loads, bodies) / 1024,
+            retained(decode, bodies) / 1024,
+        )
+        print(f"{kind:<22}{row[0]:>9.0f}{row[1]:>11.0f}{row[2]:>10.1f}{row[3]:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
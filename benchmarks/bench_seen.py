@@ -0,0 +1,89 @@
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.seen import SeenSet  # noqa: E402
+
+# shaped like the lacoste and new balance filter urls
+URL = (
+    "https://lacoste.ru/catalog/sales/?set_filter=Y&arrFilter_123_2371150305=Y"
+    "&arrFilter_123_3839122159=Y&arrFilter_123_1358442632=Y&arrFilter_123_3861158667=Y"
+    "&arrFilter_123_1536390870=Y&arrFilter_123_2083355641=Y&arrFilter_123_3349330188=Y"
+    "&arrFilter_187_3563192455=Y&arrFilter_187_1298878781=Y&PAGEN_1={}"
+)
+
+
+def urls(count):
+    return (URL.format(i) for i in range(count))
+
+
+def build_sets(count):
+    # the structures BaseScraper used before: todo/busy sets and a done dict
+    todo, busy, done = set(), set(), {}
+    for url in urls(count):
+        if url not in busy and url not in done and url not in todo:
+            todo.add(url)
+            todo.remove(url)
+            busy.add(url)
+            busy.remove(url)
+            done[url] = True
+    return todo, busy, done
+
+
+def build_seen(count, bloom_bits=0):
+    seen = SeenSet(bloom_bits=bloom_bits)
+    for url in urls(count):
+        if seen.add(url):
+            seen[url] = True
+    return seen
+
+
+def measure(build, *args):
+    gc.collect()
+    started = time.perf_counter()
+    result = build(*args)
+    elapsed = time.perf_counter() - started
+    del result
+
+    # tracemalloc slows allocation down, so memory is measured on a second build
+    gc.collect()
+    tracemalloc.start()
+    result = build(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    probes = list(urls(10000))
+    started = time.perf_counter()
+    target = result[2] if isinstance(result, tuple) else result
+    for url in probes:
+        url in target
+    lookup = (time.perf_counter() - started) / len(probes)
+    return current, peak, elapsed, lookup
+
+
+def main():
+    parser = argparse.ArgumentParser(description="seen set memory benchmark")
+    parser.add_argument("-n", "--count", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{args.count} urls of {len(URL.format(0))} chars")
+    print(f"{'structure':<22}{'retained MB':>12}{'peak MB':>10}{'build s':>10}{'lookup us':>11}")
+    for name, build, extra in (
+        ("set + dict", build_sets, ()),
+        ("SeenSet", build_seen, ()),
+        ("SeenSet + bloom", build_seen, (args.count * 10,)),
+    ):
+        current, peak, elapsed, lookup = measure(build, args.count, *extra)
+        print(
+            f"{name:<22}{current / 2**20:>12.1f}{peak / 2**20:>10.1f}"
+            f"{elapsed:>10.2f}{lookup * 1e6:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import asyncio
+import functools
+import glob
+import os
+import random
+import re
+import zlib
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+from benchmarks import payloads
+from utils.cache import read_entries
+
+# a local stand-in for the shops: every url the spiders request gets a page of
+# the right shape, synthetic or recorded, with optional latency and errors
+
+JSON = "application/json"
+HTML = "text/html"
+
+
+def _padding(size):
+    # markup the extractors have to read past, without links or markers
+    line = '<div class="menu__item"><span>' + "x" * 80 + "</span></div>\n"
+    return line * (size // len(line))
+
+
+def _page(scripts, size, content=""):
+    return (
+        "<!DOCTYPE html>\n<html><head><title>shop</title></head><body>\n"
+        + _padding(size // 2)
+        + content
+        + "".join(f"<script>{script}</script>\n" for script in scripts)
+        + _padding(size // 2)
+        + "</body></html>\n"
+    ).encode()
+
+
+def _json(data):
+    return payloads.encode(data)
+
+
+def shein_section(seed, goods, page, per_page=120):
+    rnd = random.Random(seed)
+    count = max(0, min(per_page, goods - (page - 1) * per_page))
+    links = "".join(
+        f'<a href="/{rnd.choice(("Sneakers", "Boots", "Sandals"))}'
+        f'-p-{seed % 10**6}{i:03d}-cat-1980.html" class="S-product-item__img">'
+        "</a>\n"
+        for i in range(count)
+    )
+    content = f'<div class="top-info__title-sum">{goods}</div>\n{links}'
+    return _page((), 1 << 14, content)
+
+
+def shein_product(seed, size):
+    body = _json(payloads.shein_product(seed)).decode()
+    return _page([f"var gbRawData = {{\nproductIntroData: {body},\n}}"], size)
+
+
+def lacoste_section(seed, goods, size):
+    body = _json(payloads.lacoste_catalog(seed, count=goods)).decode()
+    return _page([f"window.__NUXT__={body};"], size)
+
+
+def bitrix_page(data, size, sizes=None):
+    scripts = [f"var data = {_json(data).decode()};"]
+    if sizes is not None:
+        scripts.append(f"var JS_OBJ = {_json(sizes).decode()};")
+    return _page(scripts, size)
+
+
+# shop -> function of the url path returning the fixture kind served for it
+def adidas_route(path):
+    if path.startswith("/api/plp/content-engine"):
+        return "adidas_listing"
+    if path.endswith("/availability"):
+        return "adidas_availability"
+    if path.startswith("/api/products/"):
+        return "adidas_product"
+
+
+def shein_route(path):
+    if path.startswith("/sale/"):
+        return "shein_section"
+    if path.endswith(".html"):
+        return "shein_product"
+
+
+def lacoste_route(path):
+    if path.startswith("/catalog/sales/"):
+        return "lacoste_catalog"
+
+
+def nb_route(path):
+    if path.startswith("/catalog/"):
+        return "nb_product"
+    if path.startswith("/sale/"):
+        return "nb_listing"
+
+
+def timberland_route(path):
+    if path.startswith("/catalog/"):
+        return "timberland_product"
+    if path.startswith("/sale/"):
+        return "timberland_listing"
+
+
+ROUTES = {
+    "adidas": adidas_route,
+    "reebok": adidas_route,
+    "shein": shein_route,
+    "lacoste": lacoste_route,
+    "nb": nb_route,
+    "timberland": timberland_route,
+}
+
+
+class FakeShop:
+    def __init__(
+        self,
+        shop,
+        goods=480,
+        page_size=1 << 16,
+        latency=0.0,
+        jitter=0.5,
+        error_rate=0.0,
+        error_status=503,
+        fixtures=None,
+        fixture_hosts=None,
+        seed=0,
+    ):
+        self.route = ROUTES[shop]
+        self.goods = goods
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.recorded = {}
+        if fixtures:
+            self.recorded = load_fixtures(fixtures, self.route, fixture_hosts)
+        self.random = random.Random(seed)
+        self.runner = None
+        self.requests = 0
+        self.errors = 0
+        # each url renders the same page every time it is asked for
+        self.render = functools.lru_cache(maxsize=1 << 14)(self._render)
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        host, port = self.runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def handle(self, request):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(
+                self.latency * self.random.uniform(1 - self.jitter, 1 + self.jitter)
+            )
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=self.error_status)
+
+        kind = self.route(request.path)
+        if kind is None:
+            return web.Response(status=404)
+        content_type, body = self.render(kind, request.path_qs)
+        return web.Response(body=body, content_type=content_type)
+
+    def _render(self, kind, path_qs):
+        seed = zlib.crc32(path_qs.encode())
+        if kind in self.recorded:
+            bodies = self.recorded[kind]
+            body = bodies[seed % len(bodies)]
+            return (JSON if body.lstrip()[:1] in (b"{", b"[") else HTML), body
+        return synthetic(kind, seed, path_qs, self.goods, self.page_size)
+
+
+def synthetic(kind, seed, path_qs, goods, size):
+    if kind == "adidas_listing":
+        return JSON, _json(payloads.adidas_listing(seed, count=goods))
+    if kind in ("adidas_product", "adidas_availability"):
+        return JSON, _json(payloads.KINDS[kind](seed))
+    if kind == "shein_section":
+        page = re.search(r"[?&]page=(\d+)", path_qs)
+        return HTML, shein_section(seed, goods, int(page.group(1)) if page else 1)
+    if kind == "shein_product":
+        return HTML, shein_product(seed, size)
+    if kind == "lacoste_catalog":
+        return HTML, lacoste_section(seed, goods, size)
+    if kind in ("nb_listing", "timberland_listing"):
+        base = payloads.NB_BASE if kind == "nb_listing" else payloads.TIMBERLAND_BASE
+        listing = payloads.listing_page(seed, base, pages=max(1, goods // 24))
+        return HTML, bitrix_page(listing, size)
+    if kind == "nb_product":
+        return HTML, bitrix_page(payloads.KINDS[kind](seed), size)
+    if kind == "timberland_product":
+        product = payloads.KINDS[kind](seed)
+        return HTML, bitrix_page(product, size, payloads.timberland_sizes(seed))
+    raise KeyError(kind)
+
+
+def load_fixtures(path, route, hosts=None):
+    # a response cache of real runs, the urls of the shop's hosts sorted into
+    # kinds by the route
+    bodies = {}
+    if os.path.isfile(path):
+        for url, body in read_entries(path):
+            parts = urlsplit(url)
+            if hosts is not None and parts.hostname not in hosts:
+                continue
+            kind = route(parts.path)
+            if kind is not None:
+                bodies.setdefault(kind, []).append(body)
+        return bodies
+
+    # or a directory of <kind>*, e.g. shein_product-1.html
+    directory = path
+    for path in sorted(glob.glob(os.path.join(directory, "*"))):
+        kind = os.path.basename(path).split("-")[0].rsplit(".", 1)[0]
+        with open(path, "rb") as f:
+            bodies.setdefault(kind, []).append(f.read())
+    return bodies
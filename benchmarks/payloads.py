@@ -0,0 +1,258 @@
+import json
+import random
+
+# synthetic responses shaped like what the spiders read from each shop, padded
+# with the kind of fields the shops send but the spiders ignore
+
+WORDS = (
+    "кроссовки ботинки кеды сандалии бег повседневная обувь мужчины женщины "
+    "original leather suede mesh boost primeknit lifestyle running trail"
+).split()
+
+
+def _text(rnd, words):
+    return " ".join(rnd.choice(WORDS) for _ in range(words))
+
+
+def _filler(rnd, count, depth=2):
+    data = {}
+    for i in range(count):
+        kind = rnd.random()
+        if kind < 0.4:
+            data[f"field_{i}"] = _text(rnd, rnd.randint(3, 30))
+        elif kind < 0.6:
+            data[f"number_{i}"] = rnd.randint(0, 100000)
+        elif kind < 0.7:
+            data[f"flag_{i}"] = rnd.random() < 0.5
+        elif kind < 0.85 and depth:
+            data[f"group_{i}"] = _filler(rnd, rnd.randint(2, 6), depth - 1)
+        else:
+            data[f"list_{i}"] = [
+                {"id": rnd.randint(1, 10**6), "value": _text(rnd, 4)}
+                for _ in range(rnd.randint(1, 8))
+            ]
+    return data
+
+
+def adidas_listing(seed, count=480, per_page=48):
+    rnd = random.Random(seed)
+    items = [
+        {
+            "productId": f"{rnd.choice('FGHY')}{rnd.choice('XYZ')}{rnd.randint(1000, 9999)}",
+            "displayName": _text(rnd, 3),
+            "price": rnd.randint(3000, 20000),
+            **_filler(rnd, 12, 1),
+        }
+        for _ in range(per_page)
+    ]
+    return {"raw": {"itemList": {"count": count, "items": items}}}
+
+
+def adidas_product(seed):
+    rnd = random.Random(seed)
+    standard = rnd.randint(40, 200) * 100
+    product_id = f"GX{rnd.randint(1000, 9999)}"
+    slug = "krossovki-" + rnd.choice(("ultraboost", "superstar", "forum", "terrex"))
+    return {
+        "id": product_id,
+        "name": rnd.choice(("Кроссовки ", "Кеды ", "Ботинки ")) + _text(rnd, 2),
+        "meta_data": {
+            "canonical": f"//www.adidas.ru/{slug}/{product_id}.html",
+            "description": _text(rnd, 40),
+        },
+        "attribute_list": {
+            "category": "Оbuv",
+            "productType": [rnd.choice(("Кроссовки", "Сандалии и шлепанцы"))],
+            "sport": [rnd.choice(("Lifestyle", "Бег", "Футбол"))],
+            "gender": rnd.choice(("M", "W", "U")),
+            "search_color_raw": rnd.choice(("Black", "White", "Grey")),
+            **_filler(rnd, 20, 1),
+        },
+        "pricing_information": {
+            "standard_price": standard,
+            "sale_price": standard * rnd.randint(50, 90) // 100,
+        },
+        "callouts": {
+            "callout_top_stack": [
+                {"title": f"Дополнительная скидка -{rnd.choice((10, 15, 20))}% по промокоду"}
+            ]
+        },
+        "product_description": {
+            "description_assets": {
+                "image_url": f"https://assets.adidas.com/images/{product_id}_01.jpg"
+            },
+            "text": _text(rnd, 120),
+            "usps": [_text(rnd, 8) for _ in range(6)],
+        },
+        "view_list": [
+            {"image_url": f"https://assets.adidas.com/images/{product_id}_{i:02}.jpg"}
+            for i in range(1, 9)
+        ],
+        **_filler(rnd, 40),
+    }
+
+
+def adidas_availability(seed):
+    rnd = random.Random(seed)
+    return {
+        "availability_status": "IN_STOCK",
+        "variation_list": [
+            {
+                "sku": f"sku-{seed}-{size}",
+                "size": f"{size} UK",
+                "availability": rnd.randint(0, 20),
+                "availability_status": rnd.choice(("IN_STOCK", "NOT_AVAILABLE")),
+            }
+            for size in ("6", "6.5", "7", "7.5", "8", "8.5", "9", "9.5", "10", "11")
+        ],
+    }
+
+
+def shein_product(seed):
+    rnd = random.Random(seed)
+    retail = rnd.randint(10, 60) * 100
+    sizes = [f"EUR{size}" for size in range(36, 44)]
+    return {
+        "detail": {
+            "goods_name": _text(rnd, 6),
+            "goods_img": f"//img.ltwebstatic.com/images3/{seed}_thumbnail.jpg",
+            "retailPrice": {"amount": str(retail), "amountWithSymbol": f"{retail}₽"},
+            "salePrice": {"amount": str(retail * rnd.randint(40, 90) // 100)},
+            "productDetails": [
+                {"attr_name_en": "Color", "attr_value": rnd.choice(("Black", "Beige"))},
+                {"attr_name_en": "Style", "attr_value": _text(rnd, 2)},
+                {"attr_name_en": "Pattern Type", "attr_value": _text(rnd, 1)},
+            ],
+            **_filler(rnd, 30),
+        },
+        "parentCats": {
+            "cat_url_name": rnd.choice(("Women", "Men")),
+            "children": [
+                {
+                    "cat_url_name": "Shoes",
+                    "multi": {"language_flag": "ru", "cat_name": "Обувь"},
+                    "children": [
+                        {
+                            "cat_url_name": "Sneakers",
+                            "multi": {"language_flag": "ru", "cat_name": "Кроссовки"},
+                        }
+                    ],
+                }
+            ],
+        },
+        "multiLocalSize": {
+            "size_rule_list": {
+                "EU": {
+                    str(i): {"name": size, "correspond": size[3:]}
+                    for i, size in enumerate(sizes)
+                }
+            }
+        },
+        "attrSizeList": [
+            {"attr_value": size, "stock": str(rnd.randint(0, 5))} for size in sizes
+        ],
+        "relatedColor": [_filler(rnd, 8, 1) for _ in range(4)],
+        "commentInfo": [_filler(rnd, 6, 1) for _ in range(10)],
+        **_filler(rnd, 40),
+    }
+
+
+def lacoste_catalog(seed, count=240, per_page=24):
+    rnd = random.Random(seed)
+    goods = []
+    for _ in range(per_page):
+        old = rnd.randint(60, 250) * 100
+        goods.append(
+            {
+                "name": _text(rnd, 4),
+                "code": f"{rnd.randint(10, 45)}SMA{rnd.randint(1000, 9999)}",
+                "sec_code": rnd.choice(("krossovki", "kedy", "botinki"))
+                + "-"
+                + rnd.choice(("muzhchiny", "zhenshchiny")),
+                "images": [f"//lacoste.ru/upload/{seed}_{i}.jpg" for i in range(4)],
+                "prices": {
+                    "old": f"{old:,} ₽".replace(",", " "),
+                    "current": f"{old * 6 // 10:,} ₽".replace(",", " "),
+                },
+                "offer": [{"SIZE": f"{size},5", "ID": rnd.randint(1, 10**6)} for size in range(39, 45)],
+                **_filler(rnd, 10, 1),
+            }
+        )
+    return {
+        "layout": "default",
+        "data": [
+            {"catalogData": {"info": {"count": count, "perPage": per_page}, "list": goods}}
+        ],
+        "state": _filler(rnd, 30),
+    }
+
+
+def listing_page(seed, base, pages=5, per_page=24):
+    # newbalance.ru and timberland.ru use the same bitrix data layer
+    rnd = random.Random(seed)
+    return {
+        "version": 2,
+        "listing": {
+            "pagesCount": pages,
+            "items": [
+                {
+                    "url": f"{base}/{rnd.randint(10**5, 10**6)}/",
+                    "name": _text(rnd, 3),
+                    **_filler(rnd, 8, 1),
+                }
+                for _ in range(per_page)
+            ],
+        },
+        "site": _filler(rnd, 20),
+    }
+
+
+def product_page(seed, base):
+    rnd = random.Random(seed)
+    price = rnd.randint(60, 250) * 100
+    return {
+        "version": 2,
+        "product": {
+            "url": f"{base}/{rnd.randint(10**5, 10**6)}/",
+            "name": rnd.choice(("Кроссовки ", "Ботинки ", "Мокасины ")) + _text(rnd, 2),
+            "unitPrice": price,
+            "unitSalePrice": price * rnd.randint(50, 90) // 100,
+            "imageUrl": f"/upload/iblock/{seed}.jpg",
+            "color": rnd.choice(("Black", "Wheat", "Grey")),
+            "category": ["Мужчины", "Shoes", "lifestyle"],
+            "variations": [{"size": str(size), "id": rnd.randint(1, 10**6)} for size in range(40, 46)],
+            **_filler(rnd, 25),
+        },
+        "site": _filler(rnd, 20),
+    }
+
+
+def timberland_sizes(seed):
+    rnd = random.Random(seed)
+    return {
+        "sizes": [
+            {"rus": str(size), "can_buy": rnd.choice(("Y", "N")), "id": rnd.randint(1, 10**6)}
+            for size in range(39, 47)
+        ]
+    }
+
+
+NB_BASE = "/catalog/muzhchiny/muzhskaya_obuv/lifestyle"
+TIMBERLAND_BASE = "/catalog/muzhchiny/muzhskaya_obuv/botinki"
+
+# payload kind -> factory taking a seed
+KINDS = {
+    "adidas_listing": adidas_listing,
+    "adidas_product": adidas_product,
+    "adidas_availability": adidas_availability,
+    "shein_product": shein_product,
+    "lacoste_catalog": lacoste_catalog,
+    "nb_listing": lambda seed: listing_page(seed, NB_BASE),
+    "nb_product": lambda seed: product_page(seed, NB_BASE),
+    "timberland_product": lambda seed: product_page(seed, TIMBERLAND_BASE),
+    "timberland_sizes": timberland_sizes,
+}
+
+
+def encode(data):
+    return json.dumps(data, ensure_ascii=False).encode()
@@ -2,5 +2,4 @@
 
 sleep 20
 
-python start.py shein 1
-python start.py timberland 1
\ No newline at end of file
+python start.py --brands shein timberland
\ No newline at end of file
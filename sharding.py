@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import zlib
+
+from base_scraper import close_writer, open_writer
+from spiders import CRAWLER_SELECT
+from utils import metrics
+from utils.seen import SeenSet
+
+STOP = None
+
+
+class RemoteWriter:
+    # ships parsed goods to the coordinator, which owns the db writer
+    def __init__(self, outbox, batch_size=100):
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self._buffer = []
+
+    def start(self):
+        pass
+
+    async def put(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        if self._buffer:
+            self.outbox.put(("goods", self._buffer))
+            self._buffer = []
+
+    async def close(self):
+        await self.flush()
+
+
+class ShardMixin:
+    # discovered urls and finished pages are reported to the coordinator,
+    # urls to fetch arrive through the shard's inbox
+    inbox = None
+    outbox = None
+
+    async def addurls(self, urls):
+        urls = list(urls)
+        if urls:
+            self.outbox.put(("urls", urls))
+
+    def mark_done(self, url, ok):
+        super().mark_done(url, ok)
+        self.outbox.put(("done", url, ok))
+
+    async def crawl(self):
+        workers = self._start()
+        reporter = asyncio.ensure_future(self.report_metrics())
+
+        loop = asyncio.get_event_loop()
+        while (url := await loop.run_in_executor(None, self.inbox.get)) is not STOP:
+            await self.queue.put(url)
+        await self.queue.join()
+
+        await self._stop(workers)
+        await self.writer.close()
+        reporter.cancel()
+        self.send_metrics()
+
+    async def report_metrics(self, interval=5):
+        while True:
+            await asyncio.sleep(interval)
+            self.send_metrics()
+
+    def send_metrics(self):
+        name = multiprocessing.current_process().name
+        self.outbox.put(("metrics", name, self.metrics.snapshot()))
+
+
+def shard_main(brand, sections, options, inbox, outbox):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    cls = CRAWLER_SELECT[brand]
+    shard_cls = type("Shard" + cls.__name__, (ShardMixin, cls), {})
+    # the shards are the parallelism, a parse pool in each would oversubscribe
+    # the cores
+    options = dict(options, parse_executor="inline")
+    scraper = shard_cls(*sections, writer=RemoteWriter(outbox), **options)
+    scraper.inbox = inbox
+    scraper.outbox = outbox
+
+    loop.run_until_complete(scraper.crawl())
+    outbox.put(("exit",))
+
+
+class Coordinator:
+    def __init__(self, inboxes, outbox, processes, writer):
+        self.inboxes = inboxes
+        self.outbox = outbox
+        self.processes = processes
+        self.writer = writer
+        self.seen = SeenSet()
+        self.pending = 0
+
+    def route(self, urls):
+        for url in urls:
+            if self.seen.add(url):
+                self.pending += 1
+                shard = zlib.crc32(url.encode()) % len(self.inboxes)
+                self.inboxes[shard].put(url)
+
+    async def receive(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            try:
+                return await loop.run_in_executor(None, self.outbox.get, True, 1)
+            except queue.Empty:
+                dead = [p for p in self.processes if p.exitcode not in (None, 0)]
+                if dead:
+                    raise RuntimeError(f"shard process {dead[0].name} died")
+
+    def stop_when_idle(self):
+        if not self.pending:
+            for inbox in self.inboxes:
+                inbox.put(STOP)
+
+    async def run(self, seeds):
+        self.route(seeds)
+        self.stop_when_idle()
+        running = len(self.processes)
+        while running:
+            message = await self.receive()
+            kind = message[0]
+            if kind == "urls":
+                self.route(message[1])
+            elif kind == "done":
+                _, url, ok = message
+                self.seen[url] = ok
+                self.pending -= 1
+                self.stop_when_idle()
+                if self.seen.finished % 100 == 0:
+                    logging.info(
+                        "%s completed tasks, %s pending", self.seen.finished, self.pending
+                    )
+            elif kind == "goods":
+                for good in message[1]:
+                    await self.writer.put(good)
+            elif kind == "metrics":
+                metrics.REGISTRY.absorb(message[1], message[2])
+            elif kind == "exit":
+                running -= 1
+
+
+async def run_sharded(brand, sections, options, shards):
+    # spawn keeps the children clear of the parent's event loop
+    # the shards share each proxy's request quota
+    options = dict(options, proxy_sync=True)
+    ctx = multiprocessing.get_context("spawn")
+    inboxes = [ctx.Queue() for _ in range(shards)]
+    outbox = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=shard_main,
+            args=(brand, sections, options, inboxes[i], outbox),
+            name=f"{brand}-{i}",
+            daemon=True,
+        )
+        for i in range(shards)
+    ]
+    for process in processes:
+        process.start()
+
+    scraper = CRAWLER_SELECT[brand](*sections, **options)
+    logging.info("%s starting with %s shards", scraper.brand, shards)
+    writer = await open_writer(scraper.options["sink"], scraper.options["sink_path"])
+    coordinator = Coordinator(inboxes, outbox, processes, writer)
+    try:
+        await coordinator.run(scraper.seed_urls())
+    finally:
+        await close_writer(writer)
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    logging.info("%s scraped: %s items", scraper.brand, coordinator.seen.finished)
@@ -0,0 +1,10 @@
+from spiders import adidas, lacoste, new_balance, reebok, shein, timberland
+
+CRAWLER_SELECT = {
+    "adidas": adidas.AdidasScraper,
+    "reebok": reebok.ReebokScraper,
+    "lacoste": lacoste.LacosteScraper,
+    "nb": new_balance.NBScraper,
+    "timberland": timberland.TimberlandScraper,
+    "shein": shein.SheinScraper,
+}
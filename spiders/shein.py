@@ -1,17 +1,13 @@
-import asyncio
-import json
-import logging
 import re
+from typing import Dict, List, Optional
 
 from base_scraper import BaseScraper
-from utils.models import Item
+from utils.schema import Struct, decoder
 
 
-def discount_find(standard_price, sale_price):
-    if not standard_price or not sale_price:
-        return None
-    discount = int((1 - sale_price / float(standard_price)) * 100)
-    return discount
+PRODUCT_MARKER = b"productIntroData: "
+GOODS_COUNT = re.compile(r'"top-info__title-sum">(\d+)')
+LINK = re.compile(r'<a href="([\w.\/-]*)"')
 
 
 def select_type(url):
@@ -20,9 +16,76 @@ def select_type(url):
     return "good"
 
 
+def parse_section(html, first_page):
+    goods_count = None
+    if first_page:
+        goods_count = int(GOODS_COUNT.findall(html)[0])
+    links = LINK.findall(html)
+    return goods_count, links
+
+
+class Price(Struct):
+    amount: Optional[str] = None
+
+
+class ProductDetail(Struct):
+    attr_name_en: Optional[str] = None
+    attr_value: Optional[str] = None
+
+
+class Detail(Struct):
+    retailPrice: Price
+    salePrice: Price
+    productDetails: List[ProductDetail]
+    goods_name: Optional[str] = None
+    goods_img: Optional[str] = None
+
+
+class CategoryName(Struct):
+    language_flag: Optional[str] = None
+    cat_name: Optional[str] = None
+
+
+class Category(Struct):
+    cat_url_name: Optional[str] = None
+    multi: Optional[CategoryName] = None
+    children: Optional[List["Category"]] = None
+
+
+class SizeRule(Struct):
+    name: Optional[str] = None
+    correspond: Optional[str] = None
+
+
+class LocalSize(Struct):
+    size_rule_list: Dict[str, Dict[str, SizeRule]]
+
+
+class SizeAttr(Struct):
+    attr_value: Optional[str] = None
+    stock: Optional[int] = None
+
+
+class ProductIntro(Struct):
+    # only the parts parse_good reads are decoded and travel back from the executor
+    detail: Detail
+    multiLocalSize: LocalSize
+    attrSizeList: List[SizeAttr]
+    parentCats: Optional[Category] = None
+
+
+decode_product = decoder(ProductIntro)
+
+
+def load_product(json_text):
+    return decode_product(json_text)
+
+
 class SheinScraper(BaseScraper):
-    def __init__(self, *sections, brand="Shein"):
-        super().__init__(*sections, brand=brand)
+    select_type = staticmethod(select_type)
+
+    def __init__(self, *sections, brand="Shein", **options):
+        super().__init__(*sections, brand=brand, **options)
         self.sections = [
             "RU-Shoes-On-Sale-sc-00509628",
             "Shoes-On-Sale-sc-00505720",
@@ -32,97 +95,61 @@ class SheinScraper(BaseScraper):
 
         self.good_url = "https://ru.shein.com"
         self.referal_url = "https://ad.admitad.com/g/1kjlqr06u08ecf81d4cff0af71e07a/?i=5&f_id=18877&ulp="
-        self.oversale = 1
 
     async def process(self, url):
-        self.todo.remove(url)
-        self.busy.add(url)
-
-        try:
-            html = await self.session.get_html(url, retries=self.retries)
-
-        except Exception as exc:
-            logging.warning("%s : %s", url, exc)
-            self.done[url] = False
-        else:
-            url_type = select_type(url)
-            if "page" not in url and url_type == "section":
-                goods_count = int(re.findall(r'"top-info__title-sum">(\d+)', html)[0])
+        url_type = select_type(url)
+        if url_type == "section":
+            html = await self.get_html(url)
+            goods_count, links = await self.parse(parse_section, html, "page" not in url)
+
+            if goods_count is not None:
                 pages_count = goods_count // 120 + 1
 
                 new_url = url + "?page={}"
                 section_urls = [
                     new_url.format(page) for page in range(2, pages_count + 1)
                 ]
+                await self.addurls(section_urls)
 
-                asyncio.Task(self.addurls((u for u in section_urls)))
-
-            if url_type == "section":
-                links = re.findall(r'<a href="([\w.\/-]*)"', html)
-                asyncio.Task(self.addurls((self.good_url + u for u in links)))
-
-            elif url_type == "good":
-                try:
-                    json_text = re.findall(r"productIntroData: ({.+})", html)[0]
-                    data = json.loads(json_text)
-                    await self.parse_good(url, data)
-                except Exception as e:
-                    logging.debug("%s : %s", url.split("&")[0], e)
-
-            self.done[url] = True
+            await self.addurls(self.good_url + u for u in links)
 
-        self.busy.remove(url)
-
-        if len(self.done) % 100 == 0:
-            logging.info(
-                "%s completed tasks, %s still pending, todo %s",
-                len(self.done),
-                len(self.tasks),
-                len(self.todo),
-            )
+        elif url_type == "good":
+            texts = await self.extract(url, PRODUCT_MARKER, conditional=True)
+            try:
+                data = await self.parse(load_product, texts[PRODUCT_MARKER])
+                await self.parse_good(url, data)
+            except Exception as e:
+                self.parse_failed(url, e)
 
     async def parse_good(self, url, data):
-        standard_price_data = data["detail"].get("retailPrice")
-        standard_price = int(pr) if (pr := standard_price_data.get("amount")) else None
-
-        sale_price_data = data["detail"].get("salePrice")
-        sale_price = int(pr) if (pr := sale_price_data.get("amount")) else None
-
-        discount = discount_find(standard_price, sale_price)
+        standard_price = int(pr) if (pr := data.detail.retailPrice.amount) else None
+        sale_price = int(pr) if (pr := data.detail.salePrice.amount) else None
 
+        ctx = self.parse_context(data)
         good = {
             "url": self.referal_url + url,
-            "name": data["detail"].get("goods_name"),
+            "name": data.detail.goods_name,
             "brand": self.brand.title(),
-            "image": "https:" + data["detail"].get("goods_img"),
-            "gender": self.parse_info(data)[0],
-            "category": self.parse_info(data)[1],
-            "subcategory": self.parse_info(data)[2],
+            "image": "https:" + data.detail.goods_img,
+            "gender": ctx(self.parse_info)[0],
+            "category": ctx(self.parse_info)[1],
+            "subcategory": ctx(self.parse_info)[2],
             "standard_price": standard_price,
             "sale_price": sale_price,
-            "discount": discount,
-            "available_sizes": self.parse_sizes(data)[0],
-            "size_label": self.parse_sizes(data)[1],
-            "color": self.parse_color(data),
+            "available_sizes": ctx(self.parse_sizes)[0],
+            "size_label": ctx(self.parse_sizes)[1],
+            "color": ctx(self.parse_color),
         }
-        result = await Item.get_or_none(url=good["url"])
-
-        if result:
-            result = result.update_from_dict(good)
-        else:
-            result = Item(**good)
-        await result.save()
+        await self.save(good)
 
     @staticmethod
     def parse_color(data):
-        prod_details = data["detail"].get("productDetails")
-        for detail in prod_details:
-            det_name = detail.get("attr_name_en")
-            if det_name == "Color" and (color := detail.get("attr_value")):
+        for detail in data.detail.productDetails:
+            if detail.attr_name_en == "Color" and (color := detail.attr_value):
                 return color
 
     def parse_info(self, data):
-        if not (gender_data := data.get("parentCats")):
+        if not (gender_data := data.parentCats):
             return None, None, None
         gender, categories_data = self.parse_gender(gender_data)
         category, subcategories_datas = self.parse_category(categories_data)
@@ -132,21 +159,19 @@ class SheinScraper(BaseScraper):
 
     @staticmethod
     def parse_gender(data):
-        gender = data.get("cat_url_name")
-        next_data = data.get("children")
-        return gender, next_data
+        return data.cat_url_name, data.children or []
 
     @staticmethod
     def parse_category(data):
         categories = []
         next_datas = []
         for category_data in data:
-            ru_category = category_data.get("multi")
-            if ru_category and ru_category.get("language_flag") == "ru":
-                categories.append(ru_category["cat_name"])
-            elif (en_category := category_data.get("cat_url_name")) :
+            ru_category = category_data.multi
+            if ru_category and ru_category.language_flag == "ru":
+                categories.append(ru_category.cat_name)
+            elif (en_category := category_data.cat_url_name) :
                 categories.append(en_category)
-            if (next_data := category_data.get("children")) :
+            if (next_data := category_data.children) :
                 next_datas += next_data
 
         categories = ";".join(categories) if categories else None
@@ -156,31 +181,28 @@ class SheinScraper(BaseScraper):
     def parse_subcategory(data):
         subcategories = []
         for subcategory_data in data:
-            ru_subcategory = subcategory_data.get("multi")
-            if ru_subcategory and ru_subcategory.get("language_flag") == "ru":
-                subcategories.append(ru_subcategory["cat_name"])
-            elif (en_subcategory := subcategory_data.get("cat_url_name")) :
+            ru_subcategory = subcategory_data.multi
+            if ru_subcategory and ru_subcategory.language_flag == "ru":
+                subcategories.append(ru_subcategory.cat_name)
+            elif (en_subcategory := subcategory_data.cat_url_name) :
                 subcategories.append(en_subcategory)
         subcategories = ";".join(subcategories) if subcategories else None
         return subcategories
 
     @staticmethod
     def parse_sizes(data):
-        multi_local_size = data.get("multiLocalSize")
-        size_rule = multi_local_size.get("size_rule_list")
-        eu_rules = size_rule.get("EU")
+        eu_rules = data.multiLocalSize.size_rule_list.get("EU")
         sizes = []
         # if not eu_rule:
-        size_list = data.get("attrSizeList")
-        for size_data in size_list:
-            if (s := size_data.get("attr_value")) and int(size_data.get("stock")) > 0:
+        for size_data in data.attrSizeList:
+            if (s := size_data.attr_value) and (size_data.stock or 0) > 0:
                 if not eu_rules:
                     sizes.append(s.removeprefix("EUR"))
                 else:
                     for rule in eu_rules:
                         rule_data = eu_rules[rule]
-                        if s == rule_data.get("name") and rule_data.get("correspond"):
-                            sizes.append(rule_data.get("correspond"))
+                        if s == rule_data.name and rule_data.correspond:
+                            sizes.append(rule_data.correspond)
         sizes = ";".join(sizes) if sizes else None
         label = "EUR"
         return sizes, label
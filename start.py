@@ -1,36 +1,244 @@
-import asyncio
-import logging
-import sys
-
-from spiders import adidas, lacoste, new_balance, reebok, shein, timberland
-
-logging.basicConfig(level=logging.INFO)
-
-
-CRAWLER_SELECT = {
-    "adidas": adidas.AdidasScraper,
-    "reebok": reebok.ReebokScraper,
-    "lacoste": lacoste.LacosteScraper,
-    "nb": new_balance.NBScraper,
-    "timberland": timberland.TimberlandScraper,
-    "shein": shein.SheinScraper,
-}
-
-
-def main():
-    loop = asyncio.get_event_loop()
-
-    c = CRAWLER_SELECT[sys.argv[1]](*sys.argv[2:])
-    loop.run_until_complete(c.run())
-
-
-if __name__ == "__main__":
-    if "--iocp" in sys.argv:
-        from asyncio import events, windows_events
-
-        sys.argv.remove("--iocp")
-        logging.info("using iocp")
-        el = windows_events.ProactorEventLoop()
-        events.set_event_loop(el)
-
-    main()
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+from base_scraper import close_writer, open_executor, open_proxies, open_writer
+from sharding import run_sharded
+from spiders import CRAWLER_SELECT
+from utils import jsonlib, metrics
+from utils.sinks import FILE_SINKS
+
+logging.basicConfig(level=logging.INFO)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="async scraper for some shops")
+    parser.add_argument("brand", nargs="?", choices=CRAWLER_SELECT)
+    parser.add_argument("sections", nargs="*")
+    parser.add_argument(
+        "--brands",
+        nargs="+",
+        choices=CRAWLER_SELECT,
+        help="crawl several shops concurrently with their default sections",
+    )
+
+    # unset options fall back to the spider's profile
+    parser.add_argument("--maxtasks", type=int, help="initial concurrent requests")
+    parser.add_argument("--maxtasks-cap", type=int, help="adaptive concurrency ceiling")
+    parser.add_argument("--limit", type=int, help="connection pool size")
+    parser.add_argument("--limit-per-host", type=int, help="connections per host")
+    parser.add_argument("--ttl-dns-cache", type=int, help="seconds, 0 disables")
+    parser.add_argument("--keepalive-timeout", type=float, help="seconds")
+    parser.add_argument(
+        "--parse-executor",
+        choices=("process", "thread", "inline"),
+        help="where pages are parsed, inline on the event loop by default",
+    )
+    parser.add_argument("--parse-workers", type=int, help="parse executor size")
+    parser.add_argument(
+        "--json-backend",
+        choices=jsonlib.BACKENDS,
+        help=f"json decoder, {jsonlib.DEFAULT} by default",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        help="queued product pages that hold back listing pages, 0 for none",
+    )
+    parser.add_argument(
+        "--max-queued", type=int, help="queued urls before addurls waits, 0 for no bound"
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=".frontier",
+        help="where the crawl frontier is checkpointed",
+    )
+    parser.add_argument(
+        "--no-checkpoint",
+        action="store_true",
+        help="keep the frontier in memory only",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the crawl recorded in the last checkpoint",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="skip product pages and goods that did not change since the last run",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="with --incremental, fetch and write everything and store the state anew",
+    )
+    parser.add_argument(
+        "--sink",
+        choices=("postgres", *FILE_SINKS),
+        help="where goods are written, postgres by default",
+    )
+    parser.add_argument("--sink-path", help="output file of the jsonl and parquet sinks")
+    parser.add_argument(
+        "--proxy-sync",
+        action="store_true",
+        help="share proxy quotas over redis with other processes",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="serve prometheus metrics on this local port while crawling",
+    )
+    parser.add_argument("--metrics-file", help="dump the metrics as json at the end")
+    parser.add_argument("--cache", help="sqlite file caching responses between runs")
+    parser.add_argument(
+        "--cache-ttl", type=float, help="hours before a cached response is refetched"
+    )
+    parser.add_argument("--cache-size", type=int, help="MB of cached responses kept")
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="serve every request from --cache, pages not in it fail",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        help="split one brand's crawl across this many worker processes",
+    )
+
+    args = parser.parse_args(argv)
+    if args.brands and args.brand:
+        parser.error("use either a brand with sections or --brands")
+    if not args.brands and not args.brand:
+        parser.error("a brand or --brands is required")
+    if args.brands and args.shards:
+        parser.error("--shards works with a single brand")
+    if args.resume and args.no_checkpoint:
+        parser.error("--resume needs a checkpoint")
+    if args.resume and args.shards:
+        parser.error("sharded crawls are not checkpointed")
+    file_sink = args.sink not in (None, "postgres")
+    if args.resume and file_sink and args.sink_path and os.path.exists(args.sink_path):
+        # the file sinks start a new file, which would lose the goods of the
+        # pages the checkpoint counts as done
+        parser.error(f"{args.sink_path} exists, resume into another --sink-path")
+    if args.incremental and args.shards:
+        parser.error("--incremental is not supported with --shards")
+    if args.incremental and args.sink not in (None, "postgres"):
+        parser.error("--incremental keeps its state in postgres")
+    if args.refresh and not args.incremental:
+        parser.error("--refresh needs --incremental")
+    if (args.replay or args.cache_ttl or args.cache_size) and not args.cache:
+        parser.error("--replay, --cache-ttl and --cache-size need --cache")
+    return args
+
+
+def scraper_options(args):
+    return {
+        "maxtasks": args.maxtasks,
+        "maxtasks_cap": args.maxtasks_cap,
+        "limit": args.limit,
+        "limit_per_host": args.limit_per_host,
+        "ttl_dns_cache": args.ttl_dns_cache,
+        "keepalive_timeout": args.keepalive_timeout,
+        "parse_executor": args.parse_executor,
+        "parse_workers": args.parse_workers,
+        "json_backend": args.json_backend,
+        "max_pending": args.max_pending,
+        "max_queued": args.max_queued,
+        "sink": args.sink,
+        "sink_path": args.sink_path,
+        "proxy_sync": args.proxy_sync,
+        "checkpoint_dir": None if args.no_checkpoint else args.checkpoint_dir,
+        "resume": args.resume,
+        "incremental": args.incremental,
+        "refresh": args.refresh,
+        "cache_path": args.cache,
+        "cache_ttl": args.cache_ttl and args.cache_ttl * 3600,
+        "cache_max_mb": args.cache_size,
+        "replay": args.replay,
+    }
+
+
+async def run_many(scrapers):
+    # one db pool, writer, proxy pool and parse executor, each shop keeps its
+    # own session and limiter
+    options = scrapers[0].options
+    writer = await open_writer(options["sink"], options["sink_path"])
+    proxies = None
+    if any(c.options["proxies"] for c in scrapers):
+        proxies = open_proxies(options)
+    executors = {}
+    for c in scrapers:
+        c.writer = writer
+        if c.options["proxies"]:
+            c.proxies = proxies
+        kind = c.options["parse_executor"]
+        if kind not in executors:
+            executors[kind] = open_executor(kind, options["parse_workers"])
+        c.executor = executors[kind]
+    try:
+        results = await asyncio.gather(
+            *(c.crawl() for c in scrapers), return_exceptions=True
+        )
+    finally:
+        await close_writer(writer)
+        if proxies is not None:
+            await proxies.close()
+        for executor in executors.values():
+            if executor is not None:
+                executor.shutdown()
+
+    failed = []
+    for c, result in zip(scrapers, results):
+        if isinstance(result, Exception):
+            logging.error("%s failed: %r", c.brand, result)
+            failed.append(c.brand)
+    # the other shops got to finish, the run still failed
+    if failed:
+        raise RuntimeError("crawls failed: " + ", ".join(failed))
+
+
+async def with_metrics(args, coro):
+    runner = None
+    if args.metrics_port:
+        runner = await metrics.REGISTRY.serve(args.metrics_port)
+    try:
+        await coro
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+        if args.metrics_file:
+            metrics.REGISTRY.dump(args.metrics_file)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    loop = asyncio.get_event_loop()
+
+    if args.brands:
+        scrapers = [
+            CRAWLER_SELECT[brand](**scraper_options(args))
+            for brand in dict.fromkeys(args.brands)
+        ]
+        run = run_many(scrapers)
+    elif args.shards:
+        run = run_sharded(args.brand, args.sections, scraper_options(args), args.shards)
+    else:
+        c = CRAWLER_SELECT[args.brand](*args.sections, **scraper_options(args))
+        run = c.run()
+    loop.run_until_complete(with_metrics(args, run))
+
+
+if __name__ == "__main__":
+    if "--iocp" in sys.argv:
+        from asyncio import events, windows_events
+
+        sys.argv.remove("--iocp")
+        logging.info("using iocp")
+        el = windows_events.ProactorEventLoop()
+        events.set_event_loop(el)
+
+    main()
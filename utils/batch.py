@@ -0,0 +1,114 @@
+import logging
+import math
+
+from utils import normalize
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PRICES = ("standard_price", "sale_price")
+# low cardinality text stored as codes into a table of distinct values
+ENCODED = ("brand", "gender", "category", "subcategory", "size_label", "color")
+
+
+def encode(values):
+    index = {}
+    codes = [index.setdefault(value, len(index)) for value in values]
+    return codes, list(index)
+
+
+def floats(values):
+    values = [math.nan if value is None else float(value) for value in values]
+    return numpy.array(values, dtype=numpy.float64) if numpy is not None else values
+
+
+def discounts(standard, sale):
+    # int((1 - sale / standard) * 100) of the old per-spider discount_find,
+    # nan where a price is missing
+    if numpy is not None:
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            return numpy.trunc((1 - sale / standard) * 100)
+    return [
+        float(int((1 - s / st) * 100)) if st and not math.isnan(st + s) else math.nan
+        for st, s in zip(standard, sale)
+    ]
+
+
+def price_mask(standard, sale, discount):
+    # both prices set and positive, and a discount of at least 1%
+    if numpy is not None:
+        with numpy.errstate(invalid="ignore"):
+            return (standard > 0) & (sale > 0) & (discount >= 1)
+    return [st > 0 and s > 0 and d >= 1 for st, s, d in zip(standard, sale, discount)]
+
+
+class GoodsBatch:
+    def __init__(self, records):
+        self.size = len(records)
+        self.prices = {}
+        self.encoded = {}
+        self.plain = {}
+        for name in dict.fromkeys(key for record in records for key in record):
+            if name == "discount":
+                # always derived from the prices below
+                continue
+            values = [record.get(name) for record in records]
+            if name in PRICES:
+                self.prices[name] = floats(values)
+            elif name in ENCODED:
+                self.encoded[name] = encode(values)
+            else:
+                self.plain[name] = values
+        for name in PRICES:
+            if name not in self.prices:
+                self.prices[name] = floats([None] * self.size)
+
+    def normalize(self):
+        # encoded columns only map their distinct values
+        for name, func in normalize.COLUMNS:
+            if name in self.encoded:
+                codes, uniques = self.encoded[name]
+                uniques[:] = [func(v) if isinstance(v, str) else v for v in uniques]
+            elif name in self.plain:
+                column = self.plain[name]
+                mapped = {v: func(v) for v in set(column) if isinstance(v, str)}
+                self.plain[name] = [mapped.get(v, v) for v in column]
+
+    def apply_prices(self):
+        standard, sale = self.prices["standard_price"], self.prices["sale_price"]
+        self.prices["discount"] = discounts(standard, sale)
+        return price_mask(standard, sale, self.prices["discount"])
+
+    def columns(self, mask=None):
+        if mask is None:
+            keep = range(self.size)
+        elif numpy is not None:
+            keep = numpy.flatnonzero(mask).tolist()
+        else:
+            keep = [i for i, ok in enumerate(mask) if ok]
+
+        columns = {}
+        for name, values in self.prices.items():
+            if numpy is not None:
+                values = values[keep].tolist()
+            else:
+                values = [values[i] for i in keep]
+            columns[name] = [None if math.isnan(v) else v for v in values]
+        for name, (codes, uniques) in self.encoded.items():
+            columns[name] = [uniques[codes[i]] for i in keep]
+        for name, values in self.plain.items():
+            columns[name] = [values[i] for i in keep]
+        return columns
+
+
+def prepare_goods(records):
+    batch = GoodsBatch(records)
+    batch.normalize()
+    mask = batch.apply_prices()
+    columns = batch.columns(mask)
+    dropped = batch.size - len(columns["sale_price"])
+    if dropped:
+        logging.debug("%s goods without a valid price or discount dropped", dropped)
+    return columns
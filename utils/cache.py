@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ResponseCache:
+    # Response bodies in sqlite, zlib compressed and stored once per sha1 of
+    # the body, with an index from url to body. Entries older than ttl seconds
+    # are fetched again, except in replay mode where the network is never
+    # used. Past max_bytes of compressed bodies the least recently used
+    # entries are dropped. Everything runs on one background thread.
+    def __init__(self, path, ttl=None, max_bytes=1 << 31, replay=False):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._io = ThreadPoolExecutor(1)
+        self._db = None
+        # queued ahead of every other call on the single thread
+        self._opened = self._io.submit(self._open)
+
+    async def get(self, url):
+        # (body, charset) or None
+        entry = await self._call(self._get, url)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def put(self, url, body, charset=None):
+        await self._call(self._put, url, body, charset)
+
+    async def close(self):
+        await self._call(self._close)
+        self._io.shutdown()
+        logging.info(
+            "%s: %s hits, %s misses, %.1f MB",
+            self.path,
+            self.hits,
+            self.misses,
+            self.size / 2**20,
+        )
+
+    async def _call(self, func, *args):
+        # raises why the database could not be opened
+        await asyncio.wrap_future(self._opened)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._io, func, *args)
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # shards share the file
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                digest TEXT,
+                charset TEXT,
+                stored REAL,
+                used REAL
+            );
+            CREATE INDEX IF NOT EXISTS responses_used ON responses (used);
+            CREATE TABLE IF NOT EXISTS bodies (
+                digest TEXT PRIMARY KEY,
+                size INTEGER,
+                data BLOB
+            );
+            """
+        )
+        self._db.commit()
+        (self.size,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM bodies"
+        ).fetchone()
+
+    def _get(self, url):
+        row = self._db.execute(
+            "SELECT r.stored, r.charset, b.data FROM responses r"
+            " JOIN bodies b ON b.digest = r.digest WHERE r.url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        stored, charset, data = row
+        if not self.replay and self.ttl is not None and stored < time.time() - self.ttl:
+            return None
+        with self._db:
+            self._db.execute(
+                "UPDATE responses SET used = ? WHERE url = ?", (time.time(), url)
+            )
+        return zlib.decompress(data), charset
+
+    def _put(self, url, body, charset):
+        digest = hashlib.sha1(body).hexdigest()
+        now = time.time()
+        with self._db:
+            if not self._db.execute(
+                "SELECT 1 FROM bodies WHERE digest = ?", (digest,)
+            ).fetchone():
+                data = zlib.compress(body)
+                self._db.execute(
+                    "INSERT INTO bodies (digest, size, data) VALUES (?, ?, ?)",
+                    (digest, len(data), data),
+                )
+                self.size += len(data)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (url, digest, charset, stored, used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (url, digest, charset, now, now),
+            )
+        if self.size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        # down to 90% of max_bytes, bodies shared by several urls stay until
+        # the last of them goes
+        target = self.size - self.max_bytes * 0.9
+        freed = 0
+        urls = []
+        rows = self._db.execute(
+            "SELECT r.url, b.size FROM responses r"
+            " JOIN bodies b ON b.digest = r.digest ORDER BY r.used"
+        ).fetchall()
+        for url, size in rows:
+            if freed >= target:
+                break
+            urls.append((url,))
+            freed += size
+        with self._db:
+            self._db.executemany("DELETE FROM responses WHERE url = ?", urls)
+            self._db.execute(
+                "DELETE FROM bodies WHERE digest NOT IN (SELECT digest FROM responses)"
+            )
+        (self.size,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM bodies"
+        ).fetchone()
+        logging.info("%s: evicted %s responses", self.path, len(urls))
+
+    def _close(self):
+        self._db.close()
+
+
+def read_entries(path):
+    # (url, body) of every cached response, for the benchmarks' fake shop
+    db = sqlite3.connect(path)
+    try:
+        rows = db.execute(
+            "SELECT r.url, b.data FROM responses r"
+            " JOIN bodies b ON b.digest = r.digest ORDER BY r.url"
+        )
+        for url, data in rows:
+            yield url, zlib.decompress(data)
+    finally:
+        db.close()
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 0
+DONE = 1
+FAILED = 2
+
+
+class Checkpoint:
+    # frontier state in sqlite, written in batches from a background thread
+    def __init__(self, path, flush_interval=1):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._ticker = None
+        self._io = ThreadPoolExecutor(1)
+        self._db = None
+
+    async def open(self, resume=False):
+        await self._call(self._open, resume)
+        self._ticker = asyncio.ensure_future(self._tick())
+
+    async def load(self):
+        # done urls with their status and urls that were queued but not finished
+        rows = await self._call(self._select)
+        done = {url: status == DONE for url, status in rows if status != QUEUED}
+        queued = [url for url, status in rows if status == QUEUED]
+        return done, queued
+
+    def queued(self, url):
+        self._pending.setdefault(url, QUEUED)
+
+    def finished(self, url, ok):
+        self._pending[url] = DONE if ok else FAILED
+
+    async def flush(self):
+        if self._pending:
+            rows = list(self._pending.items())
+            self._pending = {}
+            await self._call(self._write, rows)
+
+    async def close(self, remove=False):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            self._ticker = None
+        await self.flush()
+        await self._call(self._close, remove)
+        self._io.shutdown()
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._io, func, *args)
+
+    def _open(self, resume):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not resume and os.path.exists(self.path):
+            os.remove(self.path)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS frontier (url TEXT PRIMARY KEY, status INTEGER)"
+        )
+        self._db.commit()
+
+    def _select(self):
+        return self._db.execute("SELECT url, status FROM frontier").fetchall()
+
+    def _write(self, rows):
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO frontier (url, status) VALUES (?, ?)", rows
+            )
+
+    def _close(self, remove):
+        self._db.close()
+        if remove:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
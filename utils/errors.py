@@ -0,0 +1,60 @@
+import asyncio
+
+import aiohttp
+
+TIMEOUT = "timeout"
+THROTTLED = "throttled"
+SERVER = "server"
+PROXY = "proxy"
+HTTP = "http"
+CONNECTION = "connection"
+PARSE = "parse"
+CIRCUIT = "circuit"
+MISS = "miss"
+OTHER = "other"
+
+# failures that mean the shop wants us to slow down
+OVERLOAD = frozenset((TIMEOUT, THROTTLED, SERVER))
+# failures that count against the proxy a request went through
+PROXY_FAILURES = frozenset((PROXY, TIMEOUT, THROTTLED, CONNECTION))
+# failures that fetching the page again would repeat
+PERMANENT = frozenset((HTTP, PARSE, MISS, OTHER))
+
+
+class NotModified(Exception):
+    # a conditional request found the page unchanged since the last run
+    pass
+
+
+class CircuitOpen(Exception):
+    # the host's circuit breaker failed the request without sending it
+    pass
+
+
+class CacheMiss(Exception):
+    # a replay run asked for a page that is not in the response cache
+    pass
+
+
+def classify(exc):
+    if isinstance(exc, asyncio.TimeoutError):
+        return TIMEOUT
+    if isinstance(exc, CircuitOpen):
+        return CIRCUIT
+    if isinstance(exc, CacheMiss):
+        return MISS
+    if isinstance(exc, (aiohttp.ClientProxyConnectionError, aiohttp.ClientHttpProxyError)):
+        return PROXY
+    if isinstance(exc, aiohttp.ClientResponseError):
+        if exc.status == 429:
+            return THROTTLED
+        if exc.status == 407:
+            return PROXY
+        if exc.status >= 500:
+            return SERVER
+        return HTTP
+    if isinstance(exc, aiohttp.ClientError):
+        return CONNECTION
+    if isinstance(exc, (ValueError, KeyError, IndexError, TypeError)):
+        return PARSE
+    return OTHER
@@ -0,0 +1,80 @@
+CHUNK_SIZE = 1 << 16
+# read at most this much of the remaining body to keep the connection alive
+DRAIN_LIMIT = 1 << 18
+
+
+async def extract_json(response, markers, chunk_size=CHUNK_SIZE, drain_limit=DRAIN_LIMIT):
+    # Streams the body until every marker's json has arrived. Like the
+    # r"marker({.+})" regexes it replaces, the json runs from the first "{" at
+    # the marker to the last "}" on the same line.
+    keep = max(len(marker) for marker in markers) - 1
+    buffer = bytearray()
+    base = 0  # stream offset of buffer[0]
+    search_from = 0
+    lines = {}  # marker -> [offset of marker, offset to look for "\n" from]
+    found = {}
+
+    while len(found) < len(markers):
+        chunk = await response.content.read(chunk_size)
+        if not chunk:
+            for marker, (start, _) in lines.items():
+                found[marker] = _segment(buffer, start - base, len(buffer), marker)
+            break
+        buffer += chunk
+
+        for marker in markers:
+            if marker not in found and marker not in lines:
+                i = buffer.find(marker, search_from - base)
+                if i >= 0:
+                    lines[marker] = [base + i, base + i]
+
+        for marker, line in list(lines.items()):
+            nl = buffer.find(b"\n", line[1] - base)
+            if nl < 0:
+                line[1] = base + len(buffer)
+                continue
+            found[marker] = _segment(buffer, line[0] - base, nl, marker)
+            del lines[marker]
+
+        search_from = max(base, base + len(buffer) - keep)
+        needed = min([search_from] + [start for start, _ in lines.values()])
+        del buffer[: needed - base]
+        base = needed
+
+    missing = [marker for marker in markers if marker not in found]
+    if missing:
+        raise ValueError(f"{missing[0].decode()} not found")
+
+    await _release(response, chunk_size, drain_limit)
+    return found
+
+
+def find_json(body, markers):
+    # the same over a whole body, e.g. one from the response cache
+    found = {}
+    for marker in markers:
+        start = body.find(marker)
+        if start < 0:
+            raise ValueError(f"{marker.decode()} not found")
+        end = body.find(b"\n", start)
+        found[marker] = _segment(body, start, len(body) if end < 0 else end, marker)
+    return found
+
+
+def _segment(buffer, start, end, marker):
+    lo = buffer.find(b"{", start, end)
+    hi = buffer.rfind(b"}", start, end)
+    if lo < 0 or hi < lo:
+        raise ValueError(f"no json after {marker.decode()}")
+    return bytes(buffer[lo : hi + 1])
+
+
+async def _release(response, chunk_size, drain_limit):
+    drained = 0
+    while drained <= drain_limit:
+        chunk = await response.content.read(chunk_size)
+        if not chunk:
+            return
+        drained += len(chunk)
+    # cheaper to reconnect than to download the rest of a big page
+    response.close()
@@ -0,0 +1,98 @@
+import asyncio
+from collections import deque
+
+GOOD = "good"
+SECTION = "section"
+
+
+class Frontier:
+    # Queue of urls to fetch with a lane per page type. get serves the non-empty
+    # lanes in proportion to their weights, and listing pages wait while
+    # max_pending product pages are queued, so goods are drained before deeper
+    # pagination adds more of them. put waits while maxsize urls are queued.
+    # Same interface as the asyncio.Queue it replaces.
+    def __init__(self, lane_of, weights=None, max_pending=None, maxsize=None):
+        self.lane_of = lane_of
+        self.weights = dict(weights or {GOOD: 4, SECTION: 1})
+        self.lanes = {name: deque() for name in self.weights}
+        self.max_pending = max_pending
+        self.maxsize = maxsize
+        self.high_water = dict.fromkeys(self.weights, 0)
+        self.blocked = 0
+        self._credit = dict.fromkeys(self.weights, 0)
+        self._taken = 0
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+        self._cond = asyncio.Condition()
+
+    def lane(self, url):
+        name = self.lane_of(url)
+        return name if name in self.lanes else SECTION
+
+    def qsize(self):
+        return sum(map(len, self.lanes.values()))
+
+    def pending(self, lane):
+        return len(self.lanes[lane])
+
+    async def put(self, url):
+        async with self._cond:
+            if self.maxsize and self.qsize() >= self.maxsize:
+                self.blocked += 1
+                self._cond.notify_all()
+                try:
+                    await self._cond.wait_for(self._has_room)
+                finally:
+                    self.blocked -= 1
+            name = self.lane(url)
+            lane = self.lanes[name]
+            lane.append(url)
+            if len(lane) > self.high_water[name]:
+                self.high_water[name] = len(lane)
+            self._unfinished += 1
+            self._finished.clear()
+            self._cond.notify_all()
+
+    async def get(self):
+        async with self._cond:
+            await self._cond.wait_for(self.qsize)
+            self._taken += 1
+            url = self._pop()
+            self._cond.notify_all()
+            return url
+
+    def task_done(self):
+        self._taken -= 1
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._finished.set()
+
+    async def join(self):
+        await self._finished.wait()
+
+    def _has_room(self):
+        # The workers put the urls they find, so if every taken url's worker
+        # were waiting here nobody would be left to drain the frontier. The
+        # last one overfills it instead.
+        return self.qsize() < self.maxsize or self.blocked >= self._taken
+
+    def _eligible(self):
+        goods = len(self.lanes[GOOD]) if GOOD in self.lanes else 0
+        paused = self.max_pending and goods >= self.max_pending
+        return [
+            name
+            for name, lane in self.lanes.items()
+            if lane and (name == GOOD or not paused)
+        ]
+
+    def _pop(self):
+        # smooth weighted round robin over the lanes that can be served
+        names = self._eligible()
+        total = 0
+        for name in names:
+            self._credit[name] += self.weights[name]
+            total += self.weights[name]
+        best = max(names, key=self._credit.__getitem__)
+        self._credit[best] -= total
+        return self.lanes[best].popleft()
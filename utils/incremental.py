@@ -0,0 +1,97 @@
+import hashlib
+import json
+from collections import deque
+
+from utils.models import PageState
+from utils.writer import BulkWriter
+
+
+def content_hash(good):
+    payload = json.dumps(good, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+class IncrementalState:
+    # Validators and hashes are kept only once the goods they stand for are
+    # in the items table: hashes when the writer has flushed their goods, a
+    # page's validators when the page was parsed and its goods flushed, see
+    # BaseScraper.commit_pages. refresh ignores the stored state, for when
+    # the parsers changed, and writes it anew.
+    def __init__(self, brand, refresh=False):
+        self.brand = brand
+        self.refresh = refresh
+        self.pages = {}
+        self.hashes = {}
+        # url -> validators of a page that is being parsed
+        self.fetched = {}
+        # (items writer generation, url, hash) of goods not written yet
+        self.unwritten = deque()
+        self.skipped = 0
+        self.writer = BulkWriter(PageState)
+
+    async def load(self):
+        if not self.refresh:
+            rows = await PageState.filter(brand=self.brand).values_list(
+                "url", "etag", "last_modified", "content_hash"
+            )
+            for url, etag, last_modified, digest in rows:
+                if etag or last_modified:
+                    self.pages[url] = etag, last_modified
+                if digest:
+                    self.hashes[url] = digest
+        self.writer.start()
+
+    async def close(self):
+        await self.writer.close()
+
+    def validators(self, url):
+        etag, last_modified = self.pages.get(url, (None, None))
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def fetched_page(self, url, headers):
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if etag or last_modified:
+            self.fetched[url] = etag, last_modified
+
+    def forget_page(self, url):
+        self.fetched.pop(url, None)
+
+    async def page_done(self, url, ok):
+        validators = self.fetched.pop(url, None)
+        if ok and validators is not None and self.pages.get(url) != validators:
+            self.pages[url] = validators
+            await self._save(url)
+
+    def changed(self, good, generation):
+        digest = content_hash(good)
+        if self.hashes.get(good["url"]) == digest:
+            self.skipped += 1
+            return False
+        self.unwritten.append((generation, good["url"], digest))
+        return True
+
+    async def written(self, generation, ok=True):
+        while self.unwritten and self.unwritten[0][0] <= generation:
+            _, url, digest = self.unwritten.popleft()
+            if ok:
+                self.hashes[url] = digest
+                await self._save(url)
+
+    async def _save(self, url):
+        # the upsert sets every column, so the row goes whole
+        etag, last_modified = self.pages.get(url, (None, None))
+        await self.writer.put(
+            {
+                "url": url,
+                "brand": self.brand,
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": self.hashes.get(url),
+            }
+        )
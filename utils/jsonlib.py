@@ -0,0 +1,41 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _stdlib_loads(data):
+    # json.loads detects the encoding of bytes itself
+    return json.loads(data)
+
+
+BACKENDS = {"json": _stdlib_loads}
+if msgspec is not None:
+    BACKENDS["msgspec"] = msgspec.json.Decoder().decode
+if orjson is not None:
+    BACKENDS["orjson"] = orjson.loads
+
+DEFAULT = "orjson" if orjson else "msgspec" if msgspec else "json"
+
+backend = DEFAULT
+loads = BACKENDS[DEFAULT]
+
+
+def use(name=None):
+    # called in every parse worker process as well, see BaseScraper._open_executor
+    global backend, loads
+    name = name or DEFAULT
+    if name not in BACKENDS:
+        raise ValueError(
+            f"json backend {name!r} is not installed, available: {', '.join(BACKENDS)}"
+        )
+    backend = name
+    loads = BACKENDS[name]
+    return loads
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from utils.errors import OVERLOAD
+
+
+class AdaptiveLimiter:
+    # additive increase, multiplicative decrease of the in-flight request limit
+    def __init__(
+        self,
+        initial,
+        minimum=1,
+        maximum=None,
+        backoff=0.5,
+        max_error_ratio=0.05,
+        latency_tolerance=2.0,
+        cooldown=5,
+        min_window=10,
+        rebaseline=0.2,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.backoff = backoff
+        self.max_error_ratio = max_error_ratio
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.min_window = min_window
+        self.rebaseline = rebaseline
+
+        self.in_flight = 0
+        self.p95 = None
+        self.best_p95 = None
+        self.error_ratio = 0.0
+        self._saturated = False
+        self._latencies = []
+        self._errors = 0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            if self.in_flight >= int(self.limit):
+                self._saturated = True
+
+    async def release(self, latency, failure=None):
+        async with self._cond:
+            self.in_flight -= 1
+            if failure in OVERLOAD:
+                self._decrease()
+            else:
+                self._latencies.append(latency)
+                self._errors += failure is not None
+                if len(self._latencies) >= max(self.min_window, int(self.limit)):
+                    self._adjust()
+            self._cond.notify(max(1, int(self.limit) - self.in_flight))
+
+    def _adjust(self):
+        latencies = sorted(self._latencies)
+        self.p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        self.error_ratio = self._errors / len(latencies)
+        self._latencies = []
+        self._errors = 0
+        saturated, self._saturated = self._saturated, False
+
+        baseline = self.best_p95
+        if baseline is None or self.p95 < baseline:
+            self.best_p95 = self.p95
+        else:
+            # a lasting shift (time of day, another route) becomes the new
+            # normal after a few windows instead of pinning the limit down
+            self.best_p95 += (self.p95 - baseline) * self.rebaseline
+
+        if self.p95 > baseline * self.latency_tolerance if baseline else False:
+            self._decrease()
+        elif self.error_ratio <= self.max_error_ratio and saturated:
+            # a limit the workers never reached says nothing about more load
+            self.limit = min(self.maximum, self.limit + 1)
+
+    def _decrease(self):
+        # one burst of failures from requests sent at the old limit counts once
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.backoff)
+        self._latencies = []
+        self._errors = 0
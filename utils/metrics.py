@@ -0,0 +1,162 @@
+import bisect
+import json
+import logging
+import time
+
+from aiohttp import web
+
+# seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+WRITE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        # the last slot counts values above every bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def add(self, other):
+        for i, count in enumerate(other["counts"]):
+            self.counts[i] += count
+        self.sum += other["sum"]
+        self.count += other["count"]
+
+    def as_dict(self):
+        return {
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class Metrics:
+    # Series are keyed by name and a sorted tuple of label pairs. Gauges are
+    # read when the metrics are rendered. Snapshots of other processes (the
+    # shards) are added in with absorb and summed into every output.
+    def __init__(self):
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.remote = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        try:
+            histogram = self.histograms[key]
+        except KeyError:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def gauge(self, name, func, **labels):
+        self.gauges[(name, tuple(sorted(labels.items())))] = func
+
+    def absorb(self, source, snapshot):
+        # the latest snapshot per source replaces the previous one
+        self.remote[source] = snapshot
+
+    def snapshot(self, merged=False):
+        counters = dict(self.counters)
+        gauges = {key: func() for key, func in self.gauges.items()}
+        histograms = {key: h.as_dict() for key, h in self.histograms.items()}
+        if merged:
+            for snapshot in self.remote.values():
+                for name, labels, value in snapshot["counters"]:
+                    key = (name, tuple(sorted(labels.items())))
+                    counters[key] = counters.get(key, 0) + value
+                for name, labels, value in snapshot["gauges"]:
+                    key = (name, tuple(sorted(labels.items())))
+                    gauges[key] = gauges.get(key, 0) + value
+                for name, labels, value in snapshot["histograms"]:
+                    key = (name, tuple(sorted(labels.items())))
+                    histogram = Histogram(value["buckets"])
+                    if key in histograms:
+                        histogram.add(histograms[key])
+                    histogram.add(value)
+                    histograms[key] = histogram.as_dict()
+        return {
+            "uptime": time.time() - self.started,
+            "counters": [[n, dict(l), v] for (n, l), v in sorted(counters.items())],
+            "gauges": [[n, dict(l), v] for (n, l), v in sorted(gauges.items())],
+            "histograms": [[n, dict(l), v] for (n, l), v in sorted(histograms.items())],
+        }
+
+    def render(self):
+        # prometheus text exposition format
+        snapshot = self.snapshot(merged=True)
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for name, labels, value in snapshot["counters"]:
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for name, labels, value in snapshot["gauges"]:
+            header(name, "gauge")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for name, labels, value in snapshot["histograms"]:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(value["buckets"], value["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {value['count']}")
+            lines.append(f"{name}_sum{_labels(labels)} {value['sum']}")
+            lines.append(f"{name}_count{_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(merged=True), f, indent=1)
+        logging.info("metrics written to %s", path)
+
+    async def serve(self, port, host="127.0.0.1"):
+        async def metrics(request):
+            return web.Response(text=self.render(), content_type="text/plain")
+
+        async def metrics_json(request):
+            return web.json_response(self.snapshot(merged=True))
+
+        app = web.Application()
+        app.router.add_get("/metrics", metrics)
+        app.router.add_get("/metrics.json", metrics_json)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        logging.info("metrics on http://%s:%s/metrics", host, port)
+        return runner
+
+
+def _labels(labels, **extra):
+    pairs = list(labels.items()) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# one registry per process, shared by every scraper and writer in it
+REGISTRY = Metrics()
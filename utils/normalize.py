@@ -0,0 +1,108 @@
+import re
+from types import MappingProxyType
+
+# "8.5 UK" -> ("8.5", "UK")
+SIZE_PATTERN = re.compile(r"(?i)(.+) (\w+)")
+# "-20 %" in promo callouts
+PROMO_DISCOUNT = re.compile(r"-(\d+)[\s]*%")
+DIGITS = re.compile(r"\d+")
+WHITESPACE = re.compile(r"\s+")
+
+# keys are lower case, values are what the items table stores
+GENDERS = MappingProxyType(
+    {
+        "m": "Men",
+        "men": "Men",
+        "мужчины": "Men",
+        "muzhchiny": "Men",
+        "w": "Women",
+        "women": "Women",
+        "женщины": "Women",
+        "zhenshchiny": "Women",
+        "u": "Unisex",
+        "unisex": "Unisex",
+        "унисекс": "Unisex",
+        "дети": "Child",
+        "deti": "Child",
+        "child": "Child",
+        "kids": "Child",
+    }
+)
+
+CATEGORIES = MappingProxyType(
+    {
+        # adidas transliterates with a cyrillic first letter
+        "оbuv": "Обувь",
+        "obuv": "Обувь",
+        "shoes": "Обувь",
+        "обувь": "Обувь",
+        "оdezhda": "Одежда",
+        "odezhda": "Одежда",
+        "одежда": "Одежда",
+        "аksessuary": "Аксессуары",
+        "aksessuary": "Аксессуары",
+        "аксессуары": "Аксессуары",
+    }
+)
+
+SUBCATEGORIES = MappingProxyType(
+    {
+        "футбольные бутсы": "Кроссовки",
+        "сандалии и шлепанцы": "Летняя",
+        "lifestyle": "Повседневная",
+        "трейловый бег": "Бег",
+        "running": "Бег",
+        "basketball": "Баскетбол",
+    }
+)
+
+SIZE_LABELS = MappingProxyType(
+    {
+        "uk": "UK",
+        "us": "US",
+        "eu": "EU",
+        "eur": "EUR",
+        "fr": "FR",
+        "ru": "RU",
+        "rus": "RU",
+    }
+)
+
+
+def gender(value):
+    return GENDERS.get(value.strip().lower(), value)
+
+
+def category(value):
+    return ";".join(CATEGORIES.get(part.lower(), part) for part in value.split(";"))
+
+
+def subcategory(value):
+    parts = (SUBCATEGORIES.get(part.lower(), part) for part in value.split(";"))
+    return ";".join(dict.fromkeys(part for part in parts if part))
+
+
+def size_label(value):
+    return SIZE_LABELS.get(value.lower(), value.upper())
+
+
+def sizes(value):
+    parts = (part.strip().replace(",", ".") for part in value.split(";"))
+    return ";".join(dict.fromkeys(part for part in parts if part))
+
+
+def text(value):
+    return WHITESPACE.sub(" ", value).strip()
+
+
+# applied once per distinct value of a batch, see utils.batch
+COLUMNS = (
+    ("gender", gender),
+    ("category", category),
+    ("subcategory", subcategory),
+    ("size_label", size_label),
+    ("available_sizes", sizes),
+    ("name", text),
+    ("color", text),
+)
+
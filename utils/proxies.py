@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import logging
+import random
+import time
+
+try:
+    import aioredis
+except ImportError:
+    aioredis = None
+
+
+class TokenBucket:
+    def __init__(self, capacity, per_second):
+        self.capacity = capacity
+        self.rate = per_second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self):
+        # seconds until a token is available, after refill
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def limit(self, remaining):
+        # the shared quota left in this window across all processes
+        self.tokens = min(self.tokens, max(remaining, 0))
+
+
+class Proxy:
+    __slots__ = ("url", "key", "bucket", "health", "failures", "retired_until", "unsynced")
+
+    def __init__(self, url, bucket):
+        self.url = url
+        # redis keys carry a digest, not the credentials in the url
+        self.key = hashlib.md5(url.encode()).hexdigest()[:12]
+        self.bucket = bucket
+        self.health = 1.0
+        self.failures = 0
+        self.retired_until = 0.0
+        self.unsynced = 0
+
+
+class ProxyPool:
+    # Requests are spread over every proxy, weighted by recent success. Each
+    # proxy has a local token bucket for its max_requests per window quota.
+    # With a redis_uri the usage is pushed and the shared count read back every
+    # sync_interval, instead of a redis round-trip per request. The quota is
+    # the proxy's whatever shop uses it, so a process keeps one pool.
+    def __init__(
+        self,
+        urls,
+        max_requests=300,
+        window=300,
+        redis_uri=None,
+        sync_interval=5,
+        max_failures=5,
+        retire_for=300,
+    ):
+        self.proxies = [
+            Proxy(url, TokenBucket(max_requests, max_requests / window)) for url in urls
+        ]
+        if not self.proxies:
+            raise ValueError("no proxies configured")
+        self.max_requests = max_requests
+        self.window = window
+        self.redis_uri = redis_uri
+        self.sync_interval = sync_interval
+        self.max_failures = max_failures
+        self.retire_for = retire_for
+        self._redis = None
+        self._ticker = None
+
+    def start(self):
+        if self.redis_uri is not None and self._ticker is None:
+            if aioredis is None:
+                logging.warning("aioredis is not installed, proxy quotas stay local")
+                return
+            self._ticker = asyncio.ensure_future(self._tick())
+
+    async def close(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+        if self._redis is not None:
+            await self._sync()
+            self._redis.close()
+            await self._redis.wait_closed()
+            self._redis = None
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            active = [p for p in self.proxies if p.retired_until <= now]
+            if not active:
+                await asyncio.sleep(min(p.retired_until for p in self.proxies) - now)
+                continue
+
+            for proxy in active:
+                proxy.bucket.refill(now)
+            ready = [p for p in active if p.bucket.tokens >= 1]
+            if ready:
+                proxy = random.choices(ready, [p.health for p in ready])[0]
+                proxy.bucket.tokens -= 1
+                proxy.unsynced += 1
+                return proxy
+            await asyncio.sleep(min(p.bucket.wait() for p in active))
+
+    def release(self, proxy, ok):
+        if ok:
+            proxy.failures = 0
+            proxy.health = proxy.health * 0.8 + 0.2
+            return
+
+        proxy.failures += 1
+        proxy.health = max(proxy.health * 0.8, 0.05)
+        if proxy.failures >= self.max_failures:
+            logging.warning(
+                "proxy %s retired for %ss after %s failures",
+                proxy.key,
+                self.retire_for,
+                proxy.failures,
+            )
+            proxy.retired_until = time.monotonic() + self.retire_for
+            proxy.failures = 0
+            proxy.health = 0.5
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self._sync()
+            except Exception as exc:
+                logging.warning("proxy quota sync failed: %r", exc)
+
+    async def _sync(self):
+        if self._redis is None:
+            self._redis = await aioredis.create_redis_pool(self.redis_uri)
+
+        window = int(time.time() // self.window)
+        pipe = self._redis.pipeline()
+        for proxy in self.proxies:
+            key = f"proxies:{proxy.key}:{window}"
+            pipe.incrby(key, proxy.unsynced)
+            pipe.expire(key, self.window)
+            proxy.unsynced = 0
+        results = await pipe.execute()
+
+        for proxy, used in zip(self.proxies, results[::2]):
+            proxy.bucket.limit(self.max_requests - used)
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import random
+import time
+
+from utils import errors
+
+# failures worth another attempt at the same url
+RETRYABLE = frozenset(
+    (errors.TIMEOUT, errors.THROTTLED, errors.SERVER, errors.PROXY, errors.CONNECTION)
+)
+# failures that count against the host's circuit breaker, a proxy failure
+# says nothing about the shop
+HOST_FAILURES = frozenset(
+    (errors.TIMEOUT, errors.THROTTLED, errors.SERVER, errors.CONNECTION)
+)
+
+
+class RetryBudget:
+    # Every request deposits a fraction of a retry and every retry withdraws a
+    # whole one, so retries stay under ratio of the traffic however many urls
+    # fail. The reserve lets the first requests of a run retry too.
+    def __init__(self, ratio=0.2, reserve=10, cap=100):
+        self.ratio = ratio
+        self.cap = cap
+        self.tokens = float(reserve)
+        self.denied = 0
+
+    def deposit(self):
+        self.tokens = min(self.cap, self.tokens + self.ratio)
+
+    def withdraw(self):
+        if self.tokens < 1:
+            self.denied += 1
+            return False
+        self.tokens -= 1
+        return True
+
+
+class CircuitBreaker:
+    # Opens after threshold host failures in a row, and requests to the host
+    # wait until reset_after has passed. Then one probe is let through, a
+    # failed probe opens it again for twice as long, up to max_reset. A request
+    # that waited max_wait fails instead, the crawl goes on without the host.
+    def __init__(self, host, threshold=8, reset_after=10, max_reset=300, max_wait=120):
+        self.host = host
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.max_reset = max_reset
+        self.max_wait = max_wait
+        self.reset = reset_after
+        self.failures = 0
+        self.opened_until = 0.0
+        self.probing = False
+
+    @property
+    def open(self):
+        return self.failures >= self.threshold
+
+    def allow(self):
+        if not self.open:
+            return True
+        if self.probing or time.monotonic() < self.opened_until:
+            return False
+        self.probing = True
+        return True
+
+    async def wait(self):
+        # False if the circuit stayed open for max_wait
+        deadline = time.monotonic() + self.max_wait
+        while not self.allow():
+            now = time.monotonic()
+            if now >= deadline:
+                return False
+            # polls while a probe is out
+            await asyncio.sleep(min(max(self.opened_until - now, 0.05), deadline - now))
+        return True
+
+    def record(self, failure):
+        probe, self.probing = self.probing, False
+        if failure == errors.PROXY:
+            return
+        if failure not in HOST_FAILURES:
+            # the host answered
+            self.failures = 0
+            self.reset = self.reset_after
+            return
+
+        self.failures += 1
+        if probe:
+            self.reset = min(self.reset * 2, self.max_reset)
+        elif self.failures != self.threshold:
+            return
+        self.opened_until = time.monotonic() + self.reset
+        logging.warning(
+            "%s circuit open for %ss after %s failures",
+            self.host,
+            self.reset,
+            self.failures,
+        )
+
+
+class RetryPolicy:
+    # jittered exponential backoff within a retry budget, breakers per host
+    def __init__(
+        self,
+        attempts=3,
+        base_delay=0.5,
+        max_delay=30,
+        budget_ratio=0.2,
+        breaker_threshold=8,
+        breaker_reset=10,
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = RetryBudget(budget_ratio)
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.breakers = {}
+
+    def breaker(self, host):
+        try:
+            return self.breakers[host]
+        except KeyError:
+            breaker = self.breakers[host] = CircuitBreaker(
+                host, self.breaker_threshold, self.breaker_reset
+            )
+            return breaker
+
+    def should_retry(self, failure, attempt):
+        return (
+            failure in RETRYABLE
+            and attempt + 1 < self.attempts
+            and self.budget.withdraw()
+        )
+
+    def backoff(self, failure, attempt, exc=None):
+        # another proxy is picked for the next attempt, no need to wait
+        if failure == errors.PROXY:
+            return 0
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        retry_after = getattr(exc, "headers", None) and exc.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(int(retry_after), self.max_delay))
+        return delay
+
+    async def wait_closed(self):
+        # until every open breaker lets a probe through
+        now = time.monotonic()
+        waits = [b.opened_until - now for b in self.breakers.values() if b.open]
+        if waits and max(waits) > 0:
+            await asyncio.sleep(max(waits))
@@ -0,0 +1,120 @@
+import typing
+
+from utils import jsonlib
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class _SlottedMeta(type):
+    # turns annotated fields into __slots__, class level values become defaults
+    def __new__(mcs, name, bases, namespace):
+        annotations = namespace.get("__annotations__", {})
+        namespace["_defaults"] = {
+            key: namespace.pop(key) for key in annotations if key in namespace
+        }
+        namespace["__slots__"] = tuple(annotations)
+        return super().__new__(mcs, name, bases, namespace)
+
+
+class SlottedStruct(metaclass=_SlottedMeta):
+    # stand-in for msgspec.Struct when msgspec is not installed
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            if name in fields:
+                setattr(self, name, fields[name])
+            elif name in self._defaults:
+                setattr(self, name, self._defaults[name])
+            else:
+                raise ValueError(f"{type(self).__name__}.{name} is missing")
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+Struct = msgspec.Struct if msgspec is not None else SlottedStruct
+
+_converters = {}
+
+
+def _identity(value):
+    return value
+
+
+def converter(tp):
+    # a function building tp out of decoded json, unknown keys are dropped
+    if (convert := _converters.get(tp)) is None:
+        convert = _converters[tp] = _build(tp)
+    return convert
+
+
+def _build(tp):
+    origin = typing.get_origin(tp)
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+        return converter(args[0]) if len(args) == 1 else _identity
+
+    if origin is list:
+        item = converter(typing.get_args(tp)[0])
+
+        def convert_list(value):
+            return None if value is None else [item(v) for v in value]
+
+        return convert_list
+
+    if origin is dict:
+        item = converter(typing.get_args(tp)[1])
+
+        def convert_dict(value):
+            return None if value is None else {k: item(v) for k, v in value.items()}
+
+        return convert_dict
+
+    if isinstance(tp, type) and issubclass(tp, SlottedStruct):
+        fields = {}
+
+        def convert_struct(value):
+            if value is None:
+                return None
+            if not isinstance(value, dict):
+                raise ValueError(f"expected an object for {tp.__name__}")
+            return tp(**{k: f(value[k]) for k, f in fields.items() if k in value})
+
+        # registered before the fields so self-referencing structs terminate
+        _converters[tp] = convert_struct
+        hints = typing.get_type_hints(tp)
+        fields.update((name, converter(hints[name])) for name in tp.__slots__)
+        return convert_struct
+
+    if tp in (int, float):
+
+        def convert_number(value):
+            # msgspec's strict=False accepts numbers sent as strings too
+            return tp(value) if isinstance(value, str) else value
+
+        return convert_number
+    return _identity
+
+
+def decoder(tp):
+    # bytes -> tp, reading only the fields tp declares
+    if msgspec is not None:
+        decode = msgspec.json.Decoder(tp, strict=False).decode
+
+        def decode_struct(data):
+            try:
+                return decode(data)
+            except msgspec.DecodeError as exc:
+                raise ValueError(str(exc)) from None
+
+        return decode_struct
+
+    convert = converter(tp)
+
+    def convert_json(data):
+        return convert(jsonlib.loads(data))
+
+    return convert_json
@@ -0,0 +1,117 @@
+import hashlib
+from array import array
+
+PENDING = 1
+DONE = 2
+FAILED = 3
+
+
+def fingerprint(url):
+    # 64 bit digest, 0 marks an empty slot
+    digest = hashlib.blake2b(url.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class BloomFilter:
+    def __init__(self, bits, hashes=4):
+        self.size = bits
+        self.hashes = hashes
+        self._bits = bytearray((bits + 7) // 8)
+
+    def _positions(self, fp):
+        # double hashing over the two halves of the fingerprint
+        h1, h2 = fp & 0xFFFFFFFF, (fp >> 32) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, fp):
+        for pos in self._positions(fp):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, fp):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(fp))
+
+
+class SeenSet:
+    # url fingerprints in an open addressing table with a status byte per entry
+    def __init__(self, capacity=1024, bloom_bits=0):
+        size = 8
+        while size < capacity * 2:
+            size <<= 1
+        self._keys = array("Q", [0]) * size
+        self._status = bytearray(size)
+        self._mask = size - 1
+        self._len = 0
+        self.counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        self.bloom = BloomFilter(bloom_bits) if bloom_bits else None
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, url):
+        return self.get(url) != 0
+
+    def __setitem__(self, url, ok):
+        self._set(fingerprint(url), DONE if ok else FAILED)
+
+    @property
+    def finished(self):
+        return self.counts[DONE] + self.counts[FAILED]
+
+    @property
+    def nbytes(self):
+        bloom = len(self.bloom._bits) if self.bloom else 0
+        return len(self._keys) * self._keys.itemsize + len(self._status) + bloom
+
+    def add(self, url):
+        fp = fingerprint(url)
+        if self.bloom is None or fp in self.bloom:
+            if self._status[self._slot(fp)]:
+                return False
+        self._set(fp, PENDING)
+        return True
+
+    def get(self, url):
+        fp = fingerprint(url)
+        if self.bloom is not None and fp not in self.bloom:
+            return 0
+        return self._status[self._slot(fp)]
+
+    def update(self, done):
+        for url, ok in done.items():
+            self[url] = ok
+
+    def _slot(self, fp):
+        keys = self._keys
+        mask = self._mask
+        i = fp & mask
+        while keys[i] != fp and keys[i] != 0:
+            i = (i + 1) & mask
+        return i
+
+    def _set(self, fp, status):
+        i = self._slot(fp)
+        old = self._status[i]
+        if old:
+            self.counts[old] -= 1
+        else:
+            self._keys[i] = fp
+            self._len += 1
+            if self.bloom is not None:
+                self.bloom.add(fp)
+        self._status[i] = status
+        self.counts[status] += 1
+
+        if self._len * 10 > len(self._keys) * 7:
+            self._grow()
+
+    def _grow(self):
+        keys, status = self._keys, self._status
+        size = len(keys) * 2
+        self._keys = array("Q", [0]) * size
+        self._status = bytearray(size)
+        self._mask = size - 1
+        for i, fp in enumerate(keys):
+            if fp:
+                j = self._slot(fp)
+                self._keys[j] = fp
+                self._status[j] = status[i]
@@ -0,0 +1,128 @@
+import abc
+import asyncio
+import datetime
+import gzip
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import metrics
+from utils.batch import prepare_goods
+from utils.writer import BufferedWriter
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# the items table without its created column
+COLUMNS = (
+    "url",
+    "brand",
+    "vendor_code",
+    "name",
+    "image",
+    "gender",
+    "category",
+    "subcategory",
+    "color",
+    "standard_price",
+    "sale_price",
+    "discount",
+    "available_sizes",
+    "size_label",
+)
+FLOAT_COLUMNS = frozenset(("standard_price", "sale_price", "discount"))
+
+
+class FileSink(BufferedWriter):
+    # same interface as BulkWriter, batches go to a file from a background thread
+    suffix = ""
+
+    def __init__(self, path=None, batch_size=500, flush_interval=5):
+        super().__init__("url", batch_size, flush_interval)
+        self.path = path or time.strftime("goods-%Y%m%d-%H%M%S") + self.suffix
+        self._io = ThreadPoolExecutor(1)
+        self._file = None
+
+    async def close(self):
+        await super().close()
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self._io, self._close)
+        self._io.shutdown()
+        logging.info("%s: %s goods written", self.path, self.written)
+
+    async def _write(self, records):
+        columns = prepare_goods(records)
+        count = len(columns["url"])
+        if not count:
+            return 0
+        columns = {name: columns.get(name) or [None] * count for name in COLUMNS}
+        loop = asyncio.get_event_loop()
+        started = time.perf_counter()
+        await loop.run_in_executor(self._io, self._write_file, columns, count)
+        metrics.REGISTRY.observe(
+            "writer_flush_seconds",
+            time.perf_counter() - started,
+            metrics.WRITE_BUCKETS,
+            sink=self.name,
+        )
+        metrics.REGISTRY.inc("writer_rows_total", count, sink=self.name)
+        return count
+
+    @abc.abstractmethod
+    def _write_file(self, columns, count):
+        pass
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class JsonlSink(FileSink):
+    name = "jsonl"
+    suffix = ".jsonl.gz"
+
+    def _write_file(self, columns, count):
+        if self._file is None:
+            self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        for row in zip(*columns.values()):
+            record = dict(zip(COLUMNS, row))
+            record["last_update"] = now
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # readable up to here if the crawl dies, see the checkpoint
+        self._file.flush()
+
+
+class ParquetSink(FileSink):
+    # one row group per flush
+    name = "parquet"
+    suffix = ".parquet"
+
+    def _write_file(self, columns, count):
+        schema = parquet_schema()
+        if self._file is None:
+            self._file = pyarrow.parquet.ParquetWriter(
+                self.path, schema, compression="zstd"
+            )
+        now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+        columns["last_update"] = [now] * count
+        self._file.write_table(pyarrow.table(columns, schema=schema))
+
+
+def parquet_schema():
+    fields = [
+        (name, pyarrow.float64() if name in FLOAT_COLUMNS else pyarrow.string())
+        for name in COLUMNS
+    ]
+    fields.append(("last_update", pyarrow.timestamp("s", tz="UTC")))
+    return pyarrow.schema(fields)
+
+
+FILE_SINKS = {"jsonl": JsonlSink}
+if pyarrow is not None:
+    FILE_SINKS["parquet"] = ParquetSink
@@ -0,0 +1,246 @@
+import abc
+import asyncio
+import logging
+import time
+
+from tortoise import Tortoise
+from tortoise.exceptions import OperationalError, ValidationError
+
+from utils import metrics
+
+# bind parameter limits per statement
+MAX_PARAMS = {"postgres": 32767, "sqlite": 999}
+
+
+class BufferedWriter(abc.ABC):
+    # Records are buffered by key, a newer record replacing an older one, and
+    # written by _write in batches of batch_size or every flush_interval
+    # seconds from a background ticker. A batch that fails is kept for the
+    # next flush, up to max_attempts times.
+    #
+    # Every flush starts a new generation of the buffer. After a flush the
+    # listeners (coroutine functions) are awaited with the generation it
+    # wrote and whether the records made it: whatever was put while
+    # generation was at most that is in the sink now, or was dropped.
+    name = ""
+
+    def __init__(self, key="url", batch_size=500, flush_interval=5, max_attempts=3):
+        self.key = key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.generation = 0
+        self.listeners = []
+        self._buffer = {}
+        self._lock = asyncio.Lock()
+        self._ticker = None
+        self._attempts = 0
+        self.written = 0
+
+    def start(self):
+        if self._ticker is None:
+            self._ticker = asyncio.ensure_future(self._tick())
+
+    async def close(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+        # until written or dropped
+        while self._buffer:
+            await self.flush()
+
+    async def put(self, record):
+        self._buffer[record.get(self.key)] = record
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            generation = self.generation
+            written = True
+            if self._buffer:
+                written = await self._write_buffer()
+                if written is None:
+                    return
+            for listener in self.listeners:
+                await listener(generation, written)
+
+    async def _write_buffer(self):
+        # None while the records are kept for another attempt, False once
+        # they were dropped
+        records = self._buffer
+        self._buffer = {}
+        self.generation += 1
+        try:
+            written = await self._write(list(records.values()))
+        except Exception:
+            self._attempts += 1
+            if self._attempts < self.max_attempts:
+                logging.exception(
+                    "%s: failed to write %s records, retrying on the next flush",
+                    self.name,
+                    len(records),
+                )
+                # records put in the meantime are newer
+                records.update(self._buffer)
+                self._buffer = records
+                return None
+            logging.exception(
+                "%s: dropped %s records after %s attempts",
+                self.name,
+                len(records),
+                self._attempts,
+            )
+            self._attempts = 0
+            return False
+        self._attempts = 0
+        self.written += written
+        logging.debug("%s: wrote %s records", self.name, written)
+        return True
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    @abc.abstractmethod
+    async def _write(self, records):
+        # returns how many were written
+        pass
+
+
+class BulkWriter(BufferedWriter):
+    def __init__(
+        self, model, batch_size=500, flush_interval=5, connection="default", prepare=None
+    ):
+        super().__init__(model._meta.pk_attr, batch_size, flush_interval)
+        self.model = model
+        self.connection = connection
+        # turns the buffered records into columns before each write, see utils.batch
+        self.prepare = prepare
+
+        meta = model._meta
+        self.table = self.name = meta.db_table
+        self.pk = meta.db_pk_column
+        self.fields = []
+        self.timestamps = {}
+        for name, column in meta.fields_db_projection.items():
+            field = meta.fields_map[name]
+            if getattr(field, "auto_now_add", False):
+                # auto_now columns are refreshed on every upsert
+                self.timestamps[column] = getattr(field, "auto_now", False)
+            else:
+                self.fields.append((name, column, field))
+        self.pk_name = meta.pk_attr
+        self._pk_index = [column for _, column, _ in self.fields].index(self.pk)
+
+    def make_rows(self, records):
+        if self.prepare is not None:
+            columns = self.prepare(records)
+        else:
+            columns = {
+                name: [record.get(name) for record in records]
+                for name, _, _ in self.fields
+            }
+        count = len(columns[self.pk_name])
+
+        # rows that break a constraint (null, max_length) are skipped here, in
+        # the statement they would fail the whole batch
+        values = []
+        invalid = {}
+        for name, column, field in self.fields:
+            col = columns.get(name) or [None] * count
+            if field.default is not None and not callable(field.default):
+                col = [field.default if v is None else v for v in col]
+            db_values = []
+            for i, v in enumerate(col):
+                if v is None and not field.null:
+                    invalid.setdefault(i, f"{column} is required")
+                else:
+                    try:
+                        v = field.to_db_value(v, None)
+                    except ValidationError as exc:
+                        invalid.setdefault(i, str(exc))
+                        v = None
+                db_values.append(v)
+            values.append(db_values)
+
+        pks = columns[self.pk_name]
+        for i, reason in invalid.items():
+            logging.warning("%s: skipped %s: %s", self.table, pks[i], reason)
+        return [row for i, row in enumerate(zip(*values)) if i not in invalid]
+
+    async def _write(self, records):
+        rows = self.make_rows(records)
+        if not rows:
+            return 0
+        return await self._write_rows(rows)
+
+    async def _write_rows(self, rows):
+        # a batch the database refuses is split in halves until the rows that
+        # fail on their own are found, only those are skipped. Other errors, a
+        # lost connection say, fail the flush and the batch is kept.
+        try:
+            await self._upsert(rows)
+            return len(rows)
+        except OperationalError as exc:
+            if len(rows) == 1:
+                pk = rows[0][self._pk_index]
+                logging.warning("%s: skipped %s: %r", self.table, pk, exc)
+                return 0
+        half = len(rows) // 2
+        return await self._write_rows(rows[:half]) + await self._write_rows(rows[half:])
+
+    async def _upsert(self, rows):
+        conn = Tortoise.get_connection(self.connection)
+        dialect = conn.capabilities.dialect
+        per_statement = MAX_PARAMS.get(dialect, 999) // len(self.fields)
+
+        started = time.perf_counter()
+        for start in range(0, len(rows), per_statement):
+            chunk = rows[start : start + per_statement]
+            values = [value for row in chunk for value in row]
+            await conn.execute_query(self._statement(len(chunk), dialect), values)
+        metrics.REGISTRY.observe(
+            "writer_flush_seconds",
+            time.perf_counter() - started,
+            metrics.WRITE_BUCKETS,
+            sink=dialect,
+        )
+        metrics.REGISTRY.inc("writer_rows_total", len(rows), sink=dialect)
+
+    def _statement(self, count, dialect):
+        columns = [column for _, column, _ in self.fields] + list(self.timestamps)
+        width = len(self.fields)
+
+        groups = []
+        for i in range(count):
+            if dialect == "postgres":
+                params = [f"${i * width + j + 1}" for j in range(width)]
+            else:
+                params = ["?"] * width
+            params += ["CURRENT_TIMESTAMP"] * len(self.timestamps)
+            groups.append("(" + ",".join(params) + ")")
+
+        updates = [
+            f'"{column}"=EXCLUDED."{column}"'
+            for _, column, _ in self.fields
+            if column != self.pk
+        ]
+        updates += [
+            f'"{column}"=EXCLUDED."{column}"'
+            for column, auto_now in self.timestamps.items()
+            if auto_now
+        ]
+        return (
+            f'INSERT INTO "{self.table}" ('
+            + ",".join(f'"{column}"' for column in columns)
+            + ") VALUES "
+            + ",".join(groups)
+            + f' ON CONFLICT ("{self.pk}") DO UPDATE SET '
+            + ",".join(updates)
+        )